@@ -1,36 +1,78 @@
 from __future__ import annotations
 import json
-from typing import Any, Dict, List
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, List
 from rich.console import Console
 from rich.markdown import Markdown
 from tools.random_utls import print_observation
 
-from .prompts import SYSTEM, PLANNER_INSTRUCTION, CONTROLLER_INSTRUCTION
-from .tools import build_tool_registry
+from .prompts import (
+    SYSTEM,
+    PLANNER_INSTRUCTION,
+    CONTROLLER_INSTRUCTION,
+    DECOMPOSE_INSTRUCTION,
+    BRANCH_INSTRUCTION,
+    MERGE_INSTRUCTION,
+)
+from .tools import build_tool_registry, tool_name_index, data_version
 from .observations import Observation
+from .memory import SessionMemory
+from .repair import ControllerRepairer
+from .buffer import MessageBuffer
+from .archive import ReportArchive
 from clients.llm import LLM
 import os
 
 console = Console()
 
 class Agent:
-    def __init__(self, model: str | None = None, max_steps: int = 6, temperature: float = 0.2, verbose: bool = False):
+    def __init__(self, model: str | None = None, max_steps: int = 6, temperature: float = 0.2, verbose: bool = False,
+                 memory_size: int = 64, max_branches: int = 0,
+                 archive_path: str | None = None, interactive: bool = True, reuse_archived: bool = True,
+                 max_buffer_messages: int = 24, max_prompt_chars: int = 120_000, metrics_path: str | None = None):
         self.llm = LLM(model=model, temperature=temperature)
         self.max_steps = max_steps
         self.registry = build_tool_registry()
+        self.tool_index = tool_name_index(self.registry)
+        # Fixes tool names / args / JSON locally instead of spending a controller step on them
+        self.repairer = ControllerRepairer(self.registry, self.tool_index)
         self.verbose = verbose
         self.current_query = None
+        # Survives across run() calls so follow-up questions reuse earlier results; 0 disables it
+        self.memory = SessionMemory(max_observations=memory_size) if memory_size > 0 else None
+        # > 1 enables planner mode: independent sub-tasks researched concurrently, then merged
+        self.max_branches = max_branches
+        # interactive=False never blocks on input(): no save prompt, clarify_user answers with an error
+        self.interactive = interactive
+        # Opt-in (run_agent.py turns it on): final reports are archived, and a repeated question on the
+        # same model + data version is answered from the archive
+        self.archive = ReportArchive(archive_path) if archive_path else None
+        self.reuse_archived = reuse_archived
+        self.data_version = data_version(self.registry)
+        self._run_stats: Dict[str, Any] = {}
+        # Conversation history per controller loop: bounded in memory, older turns spill to disk
+        self.max_buffer_messages = max_buffer_messages
+        self.max_prompt_chars = max_prompt_chars
+        # Per-step memory / prompt-size metrics for the current run, also appended to metrics_path as JSONL
+        self.metrics_path = metrics_path
+        self.step_metrics: List[Dict[str, Any]] = []
+        self._metrics_lock = threading.Lock()
 
     def _handle_call_action(
         self,
         *,
         step: int,
         tool_calls: List[Dict[str, Any]],
-        messages: List[Dict[str, str]],
+        messages: MessageBuffer,
+        interactive: bool = True,
     ) -> None:
         """
         Execute the list of tool calls from the controller and append a single
         observations message back to `messages` for the next step.
+        `interactive=False` (parallel branches, --non-interactive) makes clarify_user fail instead of reading stdin.
         """
         observations: List[Observation] = []
         
@@ -42,6 +84,12 @@ class Agent:
 
             obs = Observation(tool=fn, args=args, step=step)
 
+            if fn == "clarify_user" and not interactive:
+                obs.finish(error="clarify_user is unavailable in this run; state your assumptions instead.")
+                obs.log(console, verbose=self.verbose, pretty_printer=print_observation)
+                observations.append(obs)
+                continue
+
             # Interactive path for clarify_user
             if fn == "clarify_user":
                 question = (args.get("question") or "").strip() or "Could you clarify your request?"
@@ -61,9 +109,13 @@ class Agent:
                 continue
 
             # Normal tools
-            tool = self.registry.get(fn)
+            tool = self.registry.get(self.tool_index.get((fn or "").lower(), fn))
+            remembered = self.memory.lookup(tool.name, args) if tool and self.memory else None
             if not tool:
                 obs.finish(error=f"Unknown tool {fn}")
+            elif remembered is not None:
+                console.print("[dim]  ↳ reused from session memory[/dim]")
+                obs.finish(result=remembered)
             else:
                 try:
                     # tool.call takes a JSON string and returns a JSON string
@@ -72,12 +124,19 @@ class Agent:
                 except Exception as e:
                     console.print(f"[bold red]Error during tool call →[/bold red] {fn}({args_json})")
                     obs.finish(error=str(e))
+                if self.memory:
+                    self.memory.remember(tool.name, obs)
 
             # Log if verbose
             obs.log(console, verbose=self.verbose, pretty_printer=print_observation)
 
             observations.append(obs)
 
+        with self._metrics_lock:
+            self._run_stats["tool_calls"] += [
+                {"tool": o.tool, "args": o.args, "ok": o.ok, "ms": o.duration_ms} for o in observations
+            ]
+
         # Feed all observations back as a single USER message the controller can read next turn
         obs_msg = {"observations": [o.to_message_payload() for o in observations]}
         messages.append({
@@ -90,15 +149,45 @@ class Agent:
         Finalize and return the controller's report.
         """
         final_answer = (content or "").strip() or "(no report returned)"
+        if self.memory:
+            self.memory.add_fact(self.current_query, final_answer)
         console.print(Markdown("**No tool calls left.**"))
         console.print(Markdown(f"**Final Report:**\n\n{final_answer}"))
-        save_yes_no = input("Do you want to save the final output? (y/n): ").strip().lower()
+        stats = self._run_stats
+        failed = [c["tool"] for c in stats["tool_calls"] if not c["ok"]]
+        if self.archive and (failed or stats["session_context"]):
+            # A follow-up depends on earlier answers and a run with failed tools may be
+            # degraded; neither should be replayed for the same question later
+            reason = f"failed tool calls: {', '.join(failed)}" if failed else "answer depends on earlier questions"
+            console.print(f"[dim]Not archived ({reason})[/dim]")
+        elif self.archive:
+            report_id = self.archive.record(
+                query=self.current_query,
+                answer=final_answer,
+                model=self.llm.model,
+                steps=stats["steps"],
+                tool_calls=stats["tool_calls"],
+                timings={
+                    "total_ms": int((time.perf_counter() - stats["started"]) * 1000),
+                    "llm_ms": stats["llm_ms"],
+                    "tool_ms": sum(c["ms"] or 0 for c in stats["tool_calls"]),
+                },
+                data_version=self.data_version,
+            )
+            console.print(f"[dim]Archived as report #{report_id} in {self.archive.path}[/dim]")
+        if not self.interactive:
+            return final_answer
+        try:
+            save_yes_no = input("Do you want to save the final output as markdown? (y/n): ").strip().lower()
+        except EOFError:
+            save_yes_no = "n"
         if save_yes_no == 'y':
             console.print(" content will be saved.")
             from datetime import datetime
             t = datetime.now().strftime("%Y%m%d_%H%M%S")
             os.makedirs("generated_reports", exist_ok=True)
-            label = "_".join(self.current_query.lower().split())
+            # Bounded, filesystem-safe label: the raw query can be arbitrarily long
+            label = "_".join(re.sub(r"[^\w\s-]", "", self.current_query.lower()).split())[:60] or "report"
             file_name = f"generated_reports/{label}_{t}.md"
             with open(file_name, "w", encoding="utf-8") as f:
                 f.write(final_answer)
@@ -108,30 +197,49 @@ class Agent:
     # Main loop
     # ---------------------------
 
-    def run(self, user_query: str) -> str:
-        self.current_query = user_query
-        messages: List[Dict[str, str]] = [
-            {"role": "user", "content": user_query},
-            {"role": "user", "content": PLANNER_INSTRUCTION},
-            {"role": "system", "content": SYSTEM},
-            {"role": "system", "content": CONTROLLER_INSTRUCTION},
-        ]
+    def _chat(self, messages: Iterable[Dict[str, str]]) -> Dict[str, Any]:
+        """ LLM call that also counts steps and LLM time for the report archive """
+        t0 = time.perf_counter()
+        resp = self.llm.chat(messages)
+        with self._metrics_lock:  # parallel branches share one run's stats
+            self._run_stats["steps"] += 1
+            self._run_stats["llm_ms"] += int((time.perf_counter() - t0) * 1000)
+        return resp
 
+    def _new_buffer(self, pinned: List[Dict[str, str]]) -> MessageBuffer:
+        return MessageBuffer(pinned, max_in_memory=self.max_buffer_messages, max_prompt_chars=self.max_prompt_chars)
+
+    def _record_step_metrics(self, label: str, step: int, messages: MessageBuffer) -> None:
+        metrics = {"branch": label.strip(" •") or None, "step": step, **messages.metrics()}
+        with self._metrics_lock:
+            self.step_metrics.append(metrics)
+            if self.metrics_path:
+                with open(self.metrics_path, "a", encoding="utf-8") as f:
+                    f.write(json.dumps({"query": self.current_query, **metrics}, ensure_ascii=False) + "\n")
+        if self.verbose:
+            console.print(f"[dim]{label}step {step} buffer: {metrics}[/dim]")
+
+    def _controller_loop(self, messages: MessageBuffer, *, label: str = "", interactive: bool = True) -> str | None:
+        """
+        Run controller steps until the model writes. Returns the written content,
+        or None if `max_steps` ran out first.
+        """
         for step in range(1, self.max_steps + 1):
-            console.print(f"[bold cyan]Step {step} • Calling LLM[/bold cyan]")
-            resp = self.llm.chat(messages)
+            console.print(f"[bold cyan]{label}Step {step} • Calling LLM[/bold cyan]")
+            resp = self._chat(messages.prompt())
+            self._record_step_metrics(label, step, messages)
 
             action_type = resp["type"].lower().strip()
-            tool_calls = resp["tool_calls"]
+            tool_calls = self.repairer.repair_calls(resp["tool_calls"], resp.get("repairs"), action_type)
             content = resp["content"]
 
             # If the model decided to finish i.e. no more tool calls
             if action_type == "write":
-                return self._handle_write_action(content=content)
+                return content
 
             # Log controller reasoning/notes (optional)
             if content:
-                console.print(Markdown(f"**Controller (step {step}):**\n\n{content}"))
+                console.print(Markdown(f"**{label}Controller (step {step}):**\n\n{content}"))
 
             # Append the raw controller JSON so the model “remembers” its own decisions
             raw_controller = resp.get("raw_controller")
@@ -140,7 +248,7 @@ class Agent:
 
             # Dispatch by action
             if action_type == "call" and tool_calls:
-                self._handle_call_action(step=step, tool_calls=tool_calls, messages=messages)
+                self._handle_call_action(step=step, tool_calls=tool_calls, messages=messages, interactive=interactive)
                 # Loop so the model can read observations and decide next step
                 continue
 
@@ -148,4 +256,111 @@ class Agent:
             # Unknown/empty -> nudge to continue
             messages.append({"role": "user", "content": "Continue your plan and call the next tool or finish with a report."})
 
+        return None
+
+    def run(self, user_query: str) -> str:
+        self.current_query = user_query
+        self._run_stats = {"started": time.perf_counter(), "steps": 0, "llm_ms": 0, "tool_calls": []}
+        self.step_metrics = []
+
+        # Follow-ups ("how does it compare to Venusaur?") only make sense with this session's context
+        self._run_stats["session_context"] = bool(self.memory and self.memory.refers_back(user_query))
+        archived = None
+        if self.archive and self.reuse_archived and not self._run_stats["session_context"]:
+            archived = self.archive.lookup(user_query, self.data_version, self.llm.model)
+        if archived:
+            console.print(Markdown(f"**Answered from report archive (#{archived['id']}, {archived['model']}):**\n\n{archived['answer']}"))
+            if self.memory:
+                self.memory.add_fact(user_query, archived["answer"])
+            return archived["answer"]
+
+        memory_msg = self.memory.context_message(user_query) if self.memory else None
+
+        final = None
+        if self.max_branches > 1:
+            final = self._run_branches(user_query, memory_msg)
+        if final is None:
+            pinned: List[Dict[str, str]] = [
+                {"role": "user", "content": user_query},
+                {"role": "user", "content": PLANNER_INSTRUCTION},
+                {"role": "system", "content": SYSTEM},
+                {"role": "system", "content": CONTROLLER_INSTRUCTION},
+            ]
+            if memory_msg:
+                pinned.insert(1, memory_msg)
+            messages = self._new_buffer(pinned)
+            try:
+                final = self._controller_loop(messages, interactive=self.interactive)
+            finally:
+                messages.close()
+
+        if final is not None:
+            return self._handle_write_action(content=final)
+
+        if self.memory:
+            self.memory.add_fact(user_query, "(unanswered: ran out of steps)")
         return "I wasn't able to complete the research within the allotted steps. Consider increasing --max-steps."
+
+    # ---------------------------
+    # Planner mode: parallel branches
+    # ---------------------------
+
+    def _plan_subtasks(self, user_query: str, memory_msg: Dict[str, str] | None) -> List[str]:
+        messages = [
+            {"role": "user", "content": user_query},
+            {"role": "system", "content": SYSTEM},
+            {"role": "system", "content": DECOMPOSE_INSTRUCTION.format(max_branches=self.max_branches)},
+        ]
+        if memory_msg:
+            messages.insert(1, memory_msg)
+        console.print("[bold cyan]Planning • splitting into independent sub-tasks[/bold cyan]")
+        resp = self._chat(messages)
+        raw = resp.get("raw_controller")
+        subtasks = raw.get("subtasks") if isinstance(raw, dict) else None
+        if not isinstance(subtasks, list):
+            # e.g. "Electric; Ground": iterating a string would branch on each character
+            return []
+        return [str(t).strip() for t in subtasks if isinstance(t, (str, int, float)) and str(t).strip()][: self.max_branches]
+
+    def _run_branch(self, index: int, subtask: str, user_query: str, memory_msg: Dict[str, str] | None) -> Dict[str, Any]:
+        pinned = [
+            {"role": "user", "content": f"Overall question: {user_query}\n\nYour sub-task: {subtask}"},
+            {"role": "system", "content": SYSTEM},
+            {"role": "system", "content": CONTROLLER_INSTRUCTION},
+            {"role": "system", "content": BRANCH_INSTRUCTION},
+        ]
+        if memory_msg:
+            pinned.insert(1, memory_msg)
+        messages = self._new_buffer(pinned)
+        try:
+            findings = self._controller_loop(messages, label=f"Branch {index} • ", interactive=False)
+        finally:
+            messages.close()
+        return {"subtask": subtask, "findings": findings or "(no findings: ran out of steps)"}
+
+    def _run_branches(self, user_query: str, memory_msg: Dict[str, str] | None) -> str | None:
+        """
+        Split the question into independent sub-tasks, research each in its own
+        concurrent controller loop (sharing the tool cache and session memory) and
+        merge the findings in a final write step. Returns None when the question
+        doesn't split, so the caller falls back to the linear loop.
+        """
+        subtasks = self._plan_subtasks(user_query, memory_msg)
+        if len(subtasks) < 2:
+            return None
+        for i, t in enumerate(subtasks, start=1):
+            console.print(f"[bold magenta]Branch {i}:[/bold magenta] {t}")
+
+        with ThreadPoolExecutor(max_workers=len(subtasks)) as pool:
+            futures = [pool.submit(self._run_branch, i, t, user_query, memory_msg) for i, t in enumerate(subtasks, start=1)]
+            branches = [f.result() for f in futures]
+
+        console.print("[bold cyan]Merging branch findings[/bold cyan]")
+        messages = [
+            {"role": "user", "content": user_query},
+            {"role": "system", "content": SYSTEM},
+            {"role": "user", "content": json.dumps({"branch_findings": branches}, ensure_ascii=False)},
+            {"role": "system", "content": MERGE_INSTRUCTION},
+        ]
+        resp = self._chat(messages)
+        return resp["content"] if resp["type"] == "write" else "\n\n".join(b["findings"] for b in branches)
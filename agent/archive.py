@@ -0,0 +1,122 @@
+from __future__ import annotations
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+DEFAULT_ARCHIVE_PATH = "generated_reports/archive.sqlite3"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS reports (
+    id INTEGER PRIMARY KEY,
+    created_at REAL NOT NULL,
+    query TEXT NOT NULL,
+    query_key TEXT NOT NULL,
+    answer TEXT NOT NULL,
+    model TEXT,
+    steps INTEGER,
+    tool_calls TEXT,
+    timings TEXT,
+    data_version TEXT
+);
+CREATE INDEX IF NOT EXISTS reports_lookup ON reports (query_key, data_version, model, created_at);
+"""
+
+_FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS reports_fts
+USING fts5(query, answer, content='reports', content_rowid='id');
+"""
+
+
+def query_key(query: str) -> str:
+    """ Normalized form used to recognise a repeated question """
+    return " ".join(re.sub(r"[^\w\s-]", " ", query.lower()).split())
+
+
+class ReportArchive:
+    """
+    Single SQLite store for final reports: query, answer, model, step count,
+    tool calls and timings, with an FTS5 index over query + answer (falls back
+    to LIKE when the SQLite build has no FTS5).
+    """
+
+    def __init__(self, path: str = DEFAULT_ARCHIVE_PATH):
+        self.path = path
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+        with self._conn:
+            self._conn.executescript(_SCHEMA)
+            try:
+                self._conn.executescript(_FTS_SCHEMA)
+                self.fts = True
+            except sqlite3.OperationalError:
+                self.fts = False
+
+    def record(
+        self,
+        *,
+        query: str,
+        answer: str,
+        model: str | None,
+        steps: int,
+        tool_calls: List[Dict[str, Any]],
+        timings: Dict[str, Any],
+        data_version: str,
+    ) -> int:
+        with self._lock, self._conn:
+            cur = self._conn.execute(
+                "INSERT INTO reports (created_at, query, query_key, answer, model, steps, tool_calls, timings, data_version)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (time.time(), query, query_key(query), answer, model, steps,
+                 json.dumps(tool_calls, ensure_ascii=False), json.dumps(timings), data_version),
+            )
+            if self.fts:
+                self._conn.execute(
+                    "INSERT INTO reports_fts (rowid, query, answer) VALUES (?, ?, ?)", (cur.lastrowid, query, answer)
+                )
+            return cur.lastrowid
+
+    def lookup(self, query: str, data_version: str, model: str | None) -> Optional[Dict[str, Any]]:
+        """ Latest archived report for the same question, written by the same model on the same data version """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT * FROM reports WHERE query_key = ? AND data_version = ? AND model IS ?"
+                " ORDER BY created_at DESC LIMIT 1",
+                (query_key(query), data_version, model),
+            ).fetchone()
+        return dict(row) if row else None
+
+    def search(self, text: str, limit: int = 10) -> List[Dict[str, Any]]:
+        """ Full-text search over past questions and answers, best matches first """
+        with self._lock:
+            if self.fts:
+                # Quote each term so user input can't break the FTS query syntax
+                match = " ".join('"' + t.replace('"', '""') + '"' for t in text.split())
+                rows = self._conn.execute(
+                    "SELECT r.id, r.created_at, r.query, r.model, r.steps, snippet(reports_fts, 1, '[', ']', '…', 12) AS snippet"
+                    " FROM reports_fts JOIN reports r ON r.id = reports_fts.rowid"
+                    " WHERE reports_fts MATCH ? ORDER BY rank LIMIT ?",
+                    (match, limit),
+                ).fetchall()
+            else:
+                like = f"%{text}%"
+                rows = self._conn.execute(
+                    "SELECT id, created_at, query, model, steps, substr(answer, 1, 120) AS snippet FROM reports"
+                    " WHERE query LIKE ? OR answer LIKE ? ORDER BY created_at DESC LIMIT ?",
+                    (like, like, limit),
+                ).fetchall()
+        return [dict(r) for r in rows]
+
+    def get(self, report_id: int) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM reports WHERE id = ?", (report_id,)).fetchone()
+        return dict(row) if row else None
+
+    def close(self) -> None:
+        self._conn.close()
@@ -0,0 +1,174 @@
+from __future__ import annotations
+import json
+import tempfile
+from collections import deque
+from typing import Any, Deque, Dict, Iterator, List, Optional, Tuple
+
+try:  # not available on Windows
+    import resource
+except ImportError:  # pragma: no cover
+    resource = None
+
+# Floor for the newest turn when the pinned messages alone use up the prompt budget
+MIN_NEWEST_TURN_CHARS = 2000
+
+
+def peak_rss_mb() -> Optional[float]:
+    if resource is None:
+        return None
+    # ru_maxrss is KiB on Linux
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+
+class MessageBuffer:
+    """
+    Conversation buffer for one controller loop.
+
+    - pinned: the opening messages (question, instructions, session context), always sent
+    - ring: the most recent `max_in_memory` messages, kept in memory
+    - spill: older messages, appended to an anonymous temp file (JSONL) and read back lazily
+
+    `prompt()` streams pinned + the newest history that fits `max_prompt_chars`, so the
+    prompt stays bounded however many steps the loop runs.
+    """
+
+    def __init__(self, pinned: List[Dict[str, str]], *, max_in_memory: int = 24, max_prompt_chars: int = 120_000,
+                 spill_dir: str | None = None):
+        self.pinned = list(pinned)
+        self.max_in_memory = max_in_memory
+        self.max_prompt_chars = max_prompt_chars
+        self.spill_dir = spill_dir
+        self._ring: Deque[Dict[str, str]] = deque()
+        self._ring_chars = 0
+        self._spill = None
+        self._spill_index: List[Tuple[int, int, int]] = []  # (offset, bytes, content chars)
+        self._spill_bytes = 0
+        self.last_prompt: Dict[str, int] = {"messages": 0, "chars": 0, "omitted": 0}
+
+    @staticmethod
+    def _chars(msg: Dict[str, str]) -> int:
+        return len(msg.get("content") or "")
+
+    def append(self, msg: Dict[str, str]) -> None:
+        self._ring.append(msg)
+        self._ring_chars += self._chars(msg)
+        while len(self._ring) > self.max_in_memory:
+            self._spill_one(self._ring.popleft())
+
+    def _spill_one(self, msg: Dict[str, str]) -> None:
+        if self._spill is None:
+            self._spill = tempfile.TemporaryFile(mode="w+b", dir=self.spill_dir)
+        line = (json.dumps(msg, ensure_ascii=False) + "\n").encode("utf-8")
+        self._spill.seek(0, 2)
+        self._spill_index.append((self._spill.tell(), len(line), self._chars(msg)))
+        self._spill.write(line)
+        self._spill_bytes += len(line)
+        self._ring_chars -= self._chars(msg)
+
+    def _read_spilled(self, start: int) -> Iterator[Dict[str, str]]:
+        if self._spill is None or start >= len(self._spill_index):
+            return
+        self._spill.flush()
+        self._spill.seek(self._spill_index[start][0])
+        for _ in range(start, len(self._spill_index)):
+            yield json.loads(self._spill.readline())
+
+    def __len__(self) -> int:
+        return len(self.pinned) + len(self._spill_index) + len(self._ring)
+
+    def __iter__(self) -> Iterator[Dict[str, str]]:
+        """ Full history in order, spilled messages read back from disk """
+        yield from self.pinned
+        yield from self._read_spilled(0)
+        yield from self._ring
+
+    @staticmethod
+    def _fit(turn: List[Dict[str, str]], max_chars: int) -> List[Dict[str, str]]:
+        """
+        Cut the largest messages of `turn` down to a common length so the turn fits
+        `max_chars`; short ones (the controller's own call) are kept whole.
+        """
+        sizes = sorted(MessageBuffer._chars(m) for m in turn)
+        cap, left = max_chars, max_chars
+        for i, size in enumerate(sizes):
+            share = left // (len(sizes) - i)
+            if size > share:
+                cap = share
+                break
+            left -= size
+        out = []
+        for m in turn:
+            content = m.get("content") or ""
+            if len(content) > cap:
+                m = {**m, "content": content[:cap] + f"… (truncated {len(content) - cap} chars to fit the prompt budget)"}
+            out.append(m)
+        return out
+
+    def prompt(self) -> Iterator[Dict[str, str]]:
+        """
+        Stream the messages for the next LLM call: pinned first, then the newest
+        history that fits the char budget (chosen from sizes alone, without
+        loading spilled messages that won't be sent). The newest turn (last controller
+        message and the observations after it) is always sent, truncated if it alone
+        exceeds the budget, so the model sees the result of what it just asked for.
+        """
+        budget = self.max_prompt_chars - sum(self._chars(m) for m in self.pinned)
+        ring = list(self._ring)
+        start = next((i for i in range(len(ring) - 1, -1, -1) if ring[i].get("role") == "assistant"), len(ring) - 1)
+        newest = ring[max(start, 0):]
+        newest_chars = sum(self._chars(m) for m in newest)
+        if newest_chars > budget:
+            newest = self._fit(newest, max(budget, MIN_NEWEST_TURN_CHARS))
+            budget = -1
+        else:
+            budget -= newest_chars
+
+        older = ring[:max(start, 0)]
+        keep_ring = 0
+        for i in range(len(older) - 1, -1, -1):
+            budget -= self._chars(older[i])
+            if budget < 0:
+                break
+            keep_ring += 1
+        spill_start = len(self._spill_index)
+        if budget >= 0:
+            for i in range(len(self._spill_index) - 1, -1, -1):
+                budget -= self._spill_index[i][2]
+                if budget < 0:
+                    break
+                spill_start = i
+        omitted = spill_start + (len(older) - keep_ring)
+
+        sent = chars = 0
+        for msg in self.pinned:
+            sent, chars = sent + 1, chars + self._chars(msg)
+            yield msg
+        if omitted:
+            note = {"role": "user", "content": f"({omitted} earlier messages omitted to keep the prompt bounded.)"}
+            sent, chars = sent + 1, chars + self._chars(note)
+            yield note
+        for msg in self._read_spilled(spill_start):
+            sent, chars = sent + 1, chars + self._chars(msg)
+            yield msg
+        for msg in older[len(older) - keep_ring:] + newest:
+            sent, chars = sent + 1, chars + self._chars(msg)
+            yield msg
+        self.last_prompt = {"messages": sent, "chars": chars, "omitted": omitted}
+
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            "messages_total": len(self),
+            "messages_in_memory": len(self.pinned) + len(self._ring),
+            "chars_in_memory": sum(self._chars(m) for m in self.pinned) + self._ring_chars,
+            "messages_spilled": len(self._spill_index),
+            "bytes_spilled": self._spill_bytes,
+            "prompt_messages": self.last_prompt["messages"],
+            "prompt_chars": self.last_prompt["chars"],
+            "prompt_omitted": self.last_prompt["omitted"],
+            "peak_rss_mb": peak_rss_mb(),
+        }
+
+    def close(self) -> None:
+        if self._spill is not None:
+            self._spill.close()
+            self._spill = None
@@ -0,0 +1,193 @@
+from __future__ import annotations
+import json
+import re
+import threading
+from collections import OrderedDict, deque
+from typing import Any, Deque, Dict, List, Optional, Set
+
+from .observations import Observation
+
+# Words that point back at an earlier answer ("how does it compare to Venusaur?").
+# Relative "that"/"which" are left out: they are just as common in standalone questions.
+REFERRING_WORDS = frozenset({
+    "it", "its", "they", "them", "their", "these", "those", "he", "she", "him", "her", "his",
+    "former", "latter", "same", "previous", "above", "else",
+})
+
+
+class SessionMemory:
+    """
+    Carries results across successive `Agent.run` calls in one session.
+
+    - observations: LRU map of (tool, normalized args) -> result, capped at `max_observations`
+    - entities: entity name (pokemon/type/move/...) -> observation keys, for follow-up lookup
+    - facts: the last `max_facts` question/answer pairs, answers truncated to `max_fact_chars`
+    """
+
+    def __init__(self, max_observations: int = 64, max_facts: int = 6, max_fact_chars: int = 1200,
+                 max_context_chars: int = 8000):
+        self.max_observations = max_observations
+        self.max_fact_chars = max_fact_chars
+        self.max_context_chars = max_context_chars
+        self._observations: OrderedDict[str, Dict[str, Any]] = OrderedDict()
+        self._entities: Dict[str, Set[str]] = {}
+        self._touched: Set[str] = set()  # entities seen during the current run
+        self._last_entities: Set[str] = set()
+        self.facts: Deque[Dict[str, str]] = deque(maxlen=max_facts)
+        self.hits = 0
+        self.evictions = 0
+        self._lock = threading.RLock()  # parallel branches share one memory
+
+    # --- keys / entities -----------------------------------------------------
+
+    @staticmethod
+    def key(tool: str, args: Dict[str, Any]) -> str:
+        def norm(v: Any) -> Any:
+            if isinstance(v, str):
+                return v.strip().lower()
+            if isinstance(v, list):
+                return [norm(x) for x in v]
+            return v
+        return f"{tool}:{json.dumps({k: norm(v) for k, v in args.items()}, sort_keys=True)}"
+
+    @staticmethod
+    def _entities_of(args: Dict[str, Any], result: Any) -> Set[str]:
+        names: Set[str] = set()
+        for v in args.values():
+            for x in (v if isinstance(v, list) else [v]):
+                if isinstance(x, (str, int)) and str(x).strip():
+                    names.add(str(x).strip().lower())
+        if isinstance(result, dict):
+            inner = result.get("summary", result)
+            if isinstance(inner, dict) and isinstance(inner.get("name"), str):
+                names.add(inner["name"])
+        return names
+
+    # --- observations --------------------------------------------------------
+
+    def lookup(self, tool: str, args: Dict[str, Any]) -> Optional[Any]:
+        key = self.key(tool, args)
+        with self._lock:
+            entry = self._observations.get(key)
+            if entry is None:
+                return None
+            self._observations.move_to_end(key)
+            self._touched |= entry["entities"]
+            self.hits += 1
+            return entry["result"]
+
+    def remember(self, tool: str, obs: Observation) -> None:
+        if not obs.ok or self.max_observations <= 0:
+            return
+        payload = obs.short_payload()
+        if isinstance(payload["result"], dict) and payload["result"].get("_truncated"):
+            return  # don't serve a collapsed result as if it were the real one
+        key = self.key(tool, obs.args)
+        entities = self._entities_of(obs.args, obs.result)
+        with self._lock:
+            self._observations[key] = {"tool": tool, "args": obs.args, "result": payload["result"], "entities": entities}
+            self._observations.move_to_end(key)
+            for e in entities:
+                self._entities.setdefault(e, set()).add(key)
+            self._touched |= entities
+            while len(self._observations) > self.max_observations:
+                self._evict()
+
+    def _evict(self) -> None:
+        old_key, old = self._observations.popitem(last=False)
+        for e in old["entities"]:
+            keys = self._entities.get(e)
+            if keys is not None:
+                keys.discard(old_key)
+                if not keys:
+                    del self._entities[e]
+        self.evictions += 1
+
+    # --- facts / context -----------------------------------------------------
+
+    def add_fact(self, query: str, answer: str) -> None:
+        answer = answer.strip()
+        if len(answer) > self.max_fact_chars:
+            answer = answer[: self.max_fact_chars] + "… (truncated)"
+        self.facts.append({"query": query, "answer": answer})
+        self._last_entities = self._touched
+        self._touched = set()
+
+    @staticmethod
+    def _query_terms(query: str, max_words: int = 3) -> Set[str]:
+        """ Words of `query` plus dashed runs of up to `max_words` ("Mr. Mime" -> "mr-mime") """
+        words = re.findall(r"[^\W_]+", query.lower())
+        return {"-".join(words[i:i + n]) for n in range(1, max_words + 1) for i in range(len(words) - n + 1)}
+
+    def _relevant_keys(self, query: str) -> List[str]:
+        terms = self._query_terms(query)
+        wanted = set(self._last_entities)
+        # Whole-token matches only ("ice" must not match "price"); bare numeric ids like
+        # an evolution chain's "1" would match "Gen 1" or "#10", so they never match by text
+        wanted |= {e for e in self._entities if not e.isdigit() and e in terms}
+        keys = {k for e in wanted for k in self._entities.get(e, ())}
+        # Most recently used first
+        return [k for k in reversed(self._observations) if k in keys]
+
+    def refers_back(self, query: str) -> bool:
+        """
+        Whether `query` likely depends on earlier answers in this session: it uses a
+        referring word or names something the previous question was about. Such
+        follow-ups must not be answered from, or stored in, the report archive.
+        """
+        if not self.facts:
+            return False
+        terms = self._query_terms(query)
+        if terms & REFERRING_WORDS:
+            return True
+        with self._lock:
+            return any(e in terms for e in self._last_entities if not e.isdigit())
+
+    def context_message(self, query: str) -> Optional[Dict[str, str]]:
+        """
+        A user message summarising earlier questions and the tool results relevant to
+        `query`, bounded by `max_context_chars`. None when there is nothing to carry over.
+        """
+        if not self.facts and not self._observations:
+            return None
+        budget = self.max_context_chars
+        known: List[Dict[str, Any]] = []
+        for k in self._relevant_keys(query):
+            o = self._observations[k]
+            item = {"tool": o["tool"], "args": o["args"], "result": o["result"]}
+            size = len(json.dumps(item, ensure_ascii=False))
+            if size > budget:
+                break
+            budget -= size
+            known.append(item)
+        facts: List[Dict[str, str]] = []
+        for f in reversed(self.facts):
+            size = len(json.dumps(f, ensure_ascii=False))
+            if size > budget:
+                break
+            budget -= size
+            facts.insert(0, f)
+        if not facts and not known:
+            return None
+        payload = {"session_memory": {"previous_questions": facts, "known_results": known}}
+        return {
+            "role": "user",
+            "content": "Context from earlier in this session. Reuse these results instead of calling the same tools again:\n"
+                       + json.dumps(payload, ensure_ascii=False),
+        }
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "observations": len(self._observations),
+            "entities": len(self._entities),
+            "facts": len(self.facts),
+            "hits": self.hits,
+            "evictions": self.evictions,
+        }
+
+    def clear(self) -> None:
+        self._observations.clear()
+        self._entities.clear()
+        self._touched.clear()
+        self._last_entities.clear()
+        self.facts.clear()
@@ -17,7 +17,9 @@ Rules:
 - The final output should be as detailed as possible, with specific facts and figures where relevant (e.g., base stats, encounter locations, type matchups, evolution methods).
 - The final output should always include a reccomendation or conclusion if relevant to the user query.
 
-You can call tools such as get_pokemon, get_pokemon_species, list_pokemon_by_habitat, encounters_for_pokemon, generation, version, get_type, get_move, get_ability, get_encounter_condition and get_evolution_chain
+You can call tools such as get_pokemon, get_pokemon_species, list_pokemon_by_habitat, encounters_for_pokemon, generation, version, get_type, get_move, get_ability, get_encounter_condition and get_evolution_chain.
+When you need the same kind of data for several entities (e.g. comparing Pokémon, types or moves), use the batched tools get_pokemon_many, get_type_many and get_move_many with a list of names instead of one call per entity.
+For head-to-head or "who wins" questions, call battle_matchup: it computes damage ranges, KO probabilities and speed order locally, so do not estimate damage from raw stats yourself.
 
 **You can also use the tool clarify_user e.g. if you believe the user query is incorrect or missing important context.**
 
@@ -92,3 +94,20 @@ To answer accurately, I must first know which game version the user is playing."
 }
 """
 
+DECOMPOSE_INSTRUCTION = """Split the user's request into independent research sub-tasks that can be investigated in parallel.
+Each sub-task must be answerable on its own: no sub-task may need another sub-task's result.
+Use at most {max_branches} sub-tasks. If the request cannot be split usefully, return a single sub-task.
+Return ONLY this JSON:
+{{"subtasks": ["sub-task 1", "sub-task 2"]}}
+"""
+
+BRANCH_INSTRUCTION = """You are researching ONE sub-task of a larger request; call only the tools this sub-task needs.
+clarify_user is unavailable here: state any assumptions explicitly instead.
+When done, use the "write" action and put your findings in "report": concise facts and figures only, without an introduction or a final recommendation.
+"""
+
+MERGE_INSTRUCTION = """The previous message contains findings from independent research branches for the user's request.
+Write the final answer to the request using these findings and do not call tools. Follow the SYSTEM rules for the final output.
+Return ONLY this JSON:
+{"action": "write", "confidence": 0.0-1.0, "report": "final answer"}
+"""
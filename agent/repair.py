@@ -0,0 +1,184 @@
+from __future__ import annotations
+import difflib
+import re
+import threading
+from collections import Counter
+from typing import Any, Dict, List, Optional, Tuple
+
+from .tools import Tool
+
+# Argument names the controller tends to use interchangeably
+ARG_ALIASES: Dict[str, Tuple[str, ...]] = {
+    "name_or_id": ("name", "pokemon", "pokemon_name", "species", "id", "id_or_name"),
+    "name": ("name_or_id", "id_or_name", "pokemon", "pokemon_name", "type", "type_name", "move", "move_name",
+             "ability", "ability_name", "version", "version_name"),
+    "id_or_name": ("id", "name", "name_or_id", "generation", "condition"),
+    "id": ("chain_id", "evolution_chain_id", "evolution_chain", "id_or_name", "name_or_id"),
+    "habitat": ("name", "habitat_name"),
+    "names": ("name", "pokemon", "pokemon_names", "moves", "move_names", "types", "type_names", "list"),
+    "question": ("q", "text", "message", "clarification"),
+    "pokemon_a": ("attacker", "pokemon1", "first"),
+    "pokemon_b": ("defender", "pokemon2", "second"),
+}
+
+
+# A misspelled tool name is only corrected when it is this close to a known name and
+# beats the best match for any other tool by FUZZY_MARGIN (get_item must not become get_type)
+FUZZY_CUTOFF = 0.85
+FUZZY_MARGIN = 0.1
+
+
+class ControllerRepairer:
+    """
+    Validates controller tool calls against each `Tool.schema` and fixes what can be
+    fixed locally: fuzzy tool names, aliased / unknown argument keys and argument
+    types. Counts every repair, and the controller turns that repairs saved from being wasted.
+    """
+
+    def __init__(self, registry: Dict[str, Tool], tool_index: Dict[str, str]):
+        self.registry = registry
+        self.tool_index = tool_index
+        self.stats: Counter = Counter()
+        self._lock = threading.Lock()
+
+    def _count(self, key: str, n: int = 1) -> None:
+        with self._lock:
+            self.stats[key] += n
+
+    # --- tool names ----------------------------------------------------------
+
+    def resolve_tool(self, fn: Any) -> Optional[str]:
+        name = re.sub(r"[\s-]+", "_", str(fn or "").strip().lower())
+        if name in self.registry:
+            return name
+        if name in self.tool_index:
+            return self.tool_index[name]
+        # Best ratio per tool over all of its name variants
+        scores: Dict[str, float] = {}
+        for variant, tool in self.tool_index.items():
+            ratio = difflib.SequenceMatcher(None, name, variant).ratio()
+            scores[tool] = max(scores.get(tool, 0.0), ratio)
+        ranked = sorted(scores.items(), key=lambda kv: -kv[1])
+        if not ranked or ranked[0][1] < FUZZY_CUTOFF:
+            return None
+        if len(ranked) > 1 and ranked[0][1] - ranked[1][1] < FUZZY_MARGIN:
+            return None  # ambiguous
+        return ranked[0][0]
+
+    # --- arguments -----------------------------------------------------------
+
+    @staticmethod
+    def _coerce(value: Any, spec: Dict[str, Any]) -> Any:
+        kind = spec.get("type")
+        if kind == "integer":
+            if isinstance(value, bool):
+                return value
+            if isinstance(value, float) and value.is_integer():
+                return int(value)
+            if isinstance(value, str):
+                # "1", " 1 ", or a resource URL like ".../evolution-chain/67/"
+                m = re.search(r"(\d+)/?\s*$", value)
+                if m and (value.strip().isdigit() or "/" in value):
+                    return int(m.group(1))
+            return value
+        if kind == "string":
+            if isinstance(value, list) and len(value) == 1:
+                value = value[0]
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                return str(value)
+            return value
+        if kind == "array":
+            if isinstance(value, str):
+                value = [v.strip() for v in value.split(",") if v.strip()]
+            elif not isinstance(value, list):
+                value = [value]
+            items = spec.get("items") or {}
+            return [ControllerRepairer._coerce(v, items) for v in value]
+        return value
+
+    def repair_args(self, tool: Tool, args: Any) -> Tuple[Dict[str, Any], List[str]]:
+        props: Dict[str, Any] = tool.schema.get("properties", {})
+        required: List[str] = tool.schema.get("required", [])
+        fixes: List[str] = []
+        if not isinstance(args, dict):
+            # A bare value for a single-argument tool
+            args = {required[0]: args} if len(required) == 1 else {}
+            fixes.append("args_wrapped")
+
+        out = {k: v for k, v in args.items() if k in props}
+        unknown = {k: v for k, v in args.items() if k not in props}
+        for key in [p for p in props if p not in out]:
+            alias = next((a for a in ARG_ALIASES.get(key, ()) if a in unknown), None)
+            if alias is not None:
+                out[key] = unknown.pop(alias)
+                fixes.append("args_renamed")
+        # One missing required slot and one leftover value: that's the one
+        missing = [k for k in required if k not in out]
+        if len(missing) == 1 and len(unknown) == 1:
+            out[missing[0]] = unknown.popitem()[1]
+            fixes.append("args_renamed")
+        if unknown:
+            fixes.append("args_dropped")  # would raise TypeError in handler(**args)
+
+        for key, value in list(out.items()):
+            coerced = self._coerce(value, props[key])
+            if coerced != value:
+                out[key] = coerced
+                fixes.append("args_coerced")
+        return out, fixes
+
+    @staticmethod
+    def _fails(tool: Tool, args: Any) -> bool:
+        """ Would `handler(**args)` raise on the argument names alone (as the agent calls it)? """
+        args = args or {}
+        if not isinstance(args, dict):
+            return True
+        props = tool.schema.get("properties", {})
+        return any(k not in props for k in args) or any(k not in args for k in tool.schema.get("required", []))
+
+    # --- controller turn -----------------------------------------------------
+
+    def repair_calls(
+        self,
+        tool_calls: List[Dict[str, Any]],
+        llm_repairs: List[str] | None = None,
+        action: str = "call",
+    ) -> List[Dict[str, Any]]:
+        """
+        Repair one controller turn's calls in place of a round trip back to the model.
+        Calls to tools that can't be resolved are passed through unchanged so the
+        model still sees an "Unknown tool" observation.
+
+        `steps_saved` counts turns that would have failed without a repair (unknown
+        tool, arguments `handler(**args)` rejects, unparseable call JSON, missing
+        action) and no longer fail after it. Cosmetic fixes such as "67" -> 67 are
+        counted per kind but don't save a step.
+        """
+        fixes: List[str] = list(llm_repairs or [])
+        saved = "action_inferred" in fixes or ("json_repaired" in fixes and action == "call")
+        still_failing = False
+        repaired: List[Dict[str, Any]] = []
+        for tc in tool_calls:
+            fn = tc.get("tool")
+            name = self.resolve_tool(fn)
+            if name is None:
+                still_failing = True
+                repaired.append(tc)
+                continue
+            tool = self.registry[name]
+            if name != fn:
+                fixes.append("tool_renamed")
+                # The agent itself already accepts the aliases in tool_index
+                saved |= self.registry.get(self.tool_index.get(str(fn or "").lower(), fn)) is None
+            raw_args = tc.get("args", {})
+            args, arg_fixes = self.repair_args(tool, raw_args)
+            fixes += arg_fixes
+            saved |= self._fails(tool, raw_args)
+            still_failing |= self._fails(tool, args)
+            repaired.append({"tool": name, "args": args})
+
+        for f in fixes:
+            self._count(f)
+        if saved and not still_failing:
+            self._count("steps_saved")
+        return repaired
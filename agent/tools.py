@@ -1,29 +1,37 @@
 from __future__ import annotations
 from typing import Any, Callable, Dict, List
+import hashlib
+import importlib
 import json
 
-from tools.pokeapi import (
-    tool_get_pokemon,
-    tool_get_pokemon_species,
-    tool_get_type,
-    tool_get_move,
-    tool_list_pokemon_by_habitat,
-    tool_encounters_for_pokemon,
-    tool_generation,
-    tool_version,
-    tool_get_ability,
-    tool_get_encounter_condition,
-    tool_get_evolution_chain   
-)
-
 ToolHandler = Callable[..., Dict[str, Any]]
 
+# Handlers are referenced as "module:function" and imported on first call, so building
+# the registry doesn't pull in tools.pokeapi (and with it requests/tenacity).
+POKEAPI = "tools.pokeapi"
+# Bump when PokéAPI data or a tool's output shape changes; archived answers built on an
+# older version are then no longer served (see agent/archive.py).
+DATA_VERSION = 1
+
 class Tool:
-    def __init__(self, name: str, description: str, schema: Dict[str, Any], handler: ToolHandler):
+    def __init__(self, name: str, description: str, schema: Dict[str, Any], handler: ToolHandler | str):
         self.name = name
         self.description = description
         self.schema = schema
-        self.handler = handler
+        self._handler = handler
+
+    @property
+    def handler(self) -> ToolHandler:
+        if isinstance(self._handler, str):
+            module, _, attr = self._handler.partition(":")
+            self._handler = getattr(importlib.import_module(module), attr)
+        return self._handler
+
+    @property
+    def handler_ref(self) -> str:
+        if isinstance(self._handler, str):
+            return self._handler
+        return f"{self._handler.__module__}:{self._handler.__qualname__}"
 
     def to_openai_spec(self) -> Dict[str, Any]:
         return {
@@ -41,6 +49,9 @@ class Tool:
         # Return as a compact JSON string
         return json.dumps(result, ensure_ascii=False)
 
+def _clarify_user(question: str) -> Dict[str, Any]:
+    return {"response": f"Please clarify: {question}"}
+
 def build_tool_registry() -> Dict[str, Tool]:
     return {
         "get_pokemon": Tool(
@@ -48,20 +59,20 @@ def build_tool_registry() -> Dict[str, Tool]:
             description="Fetch core data about a Pokemon by name (types, stats, abilities).",
             schema={
                 "type": "object",
-                "properties": {"name": {"type": "string"}},
-                "required": ["name"],
+                "properties": {"name_or_id": {"type": "string"}},
+                "required": ["name_or_id"],
             },
-            handler=tool_get_pokemon,
+            handler=f"{POKEAPI}:tool_get_pokemon",
         ),
         "get_pokemon_species": Tool(
             name="get_pokemon_species",
             description="Fetch  additional data about Pokemon: Pokemon species info (habitat, growth rate, legendary/mythical flags).",
             schema={
                 "type": "object",
-                "properties": {"name": {"type": "string"}},
-                "required": ["name"],
+                "properties": {"name_or_id": {"type": "string"}},
+                "required": ["name_or_id"],
             },
-            handler=tool_get_pokemon_species,
+            handler=f"{POKEAPI}:tool_get_pokemon_species",
         ),
         "get_type": Tool(
             name="get_type",
@@ -71,7 +82,7 @@ def build_tool_registry() -> Dict[str, Tool]:
                 "properties": {"name": {"type": "string"}},
                 "required": ["name"],
             },
-            handler=tool_get_type,
+            handler=f"{POKEAPI}:tool_get_type",
         ),
         "get_move": Tool(
             name="get_move",
@@ -81,7 +92,7 @@ def build_tool_registry() -> Dict[str, Tool]:
                 "properties": {"name": {"type": "string"}},
                 "required": ["name"],
             },
-            handler=tool_get_move,
+            handler=f"{POKEAPI}:tool_get_move",
         ),
         "list_pokemon_by_habitat": Tool(
             name="list_pokemon_by_habitat",
@@ -91,7 +102,7 @@ def build_tool_registry() -> Dict[str, Tool]:
                 "properties": {"habitat": {"type": "string"}},
                 "required": ["habitat"],
             },
-            handler=tool_list_pokemon_by_habitat,
+            handler=f"{POKEAPI}:tool_list_pokemon_by_habitat",
         ),
         "encounters_for_pokemon": Tool(
             name="encounters_for_pokemon",
@@ -101,7 +112,7 @@ def build_tool_registry() -> Dict[str, Tool]:
                 "properties": {"name": {"type": "string"}},
                 "required": ["name"],
             },
-            handler=tool_encounters_for_pokemon,
+            handler=f"{POKEAPI}:tool_encounters_for_pokemon",
         ),
         "generation": Tool(
             name="generation",
@@ -111,7 +122,7 @@ def build_tool_registry() -> Dict[str, Tool]:
                 "properties": {"id_or_name": {"type": "string"}},
                 "required": ["id_or_name"],
             },
-            handler=tool_generation,
+            handler=f"{POKEAPI}:tool_generation",
         ),
         "version": Tool(
             name="version",
@@ -121,7 +132,7 @@ def build_tool_registry() -> Dict[str, Tool]:
                 "properties": {"name": {"type": "string"}},
                 "required": ["name"],
             },
-            handler=tool_version,
+            handler=f"{POKEAPI}:tool_version",
         ),
         "get_ability": Tool(
             name="get_ability",
@@ -131,7 +142,7 @@ def build_tool_registry() -> Dict[str, Tool]:
                 "properties": {"name": {"type": "string"}},
                 "required": ["name"],
             },
-            handler=tool_get_ability,
+            handler=f"{POKEAPI}:tool_get_ability",
         ),
         "clarify_user": Tool(
             name="clarify_user",
@@ -142,7 +153,7 @@ def build_tool_registry() -> Dict[str, Tool]:
                 "required": ["question"],
             },
             # If your loop handles this interactively, the handler won't be used.
-            handler=lambda question: {"response": f"Please clarify: {question}"},
+            handler=_clarify_user,
         ),
         "get_encounter_condition": Tool(
             name="get_encounter_condition",
@@ -152,7 +163,7 @@ def build_tool_registry() -> Dict[str, Tool]:
                 "properties": {"id_or_name": {"type": "string"}},
                 "required": ["id_or_name"],
             },
-            handler=tool_get_encounter_condition,
+            handler=f"{POKEAPI}:tool_get_encounter_condition",
         ),
         "get_evolution_chain": Tool(
             name="get_evolution_chain",
@@ -162,10 +173,75 @@ def build_tool_registry() -> Dict[str, Tool]:
                 "properties": {"id": {"type": "integer"}},
                 "required": ["id"],
             },
-            handler=tool_get_evolution_chain
+            handler=f"{POKEAPI}:tool_get_evolution_chain"
+        ),
+        "get_pokemon_many": Tool(
+            name="get_pokemon_many",
+            description="Fetch several Pokémon at once; returns one stats table (row per Pokémon). Prefer this for comparisons.",
+            schema={
+                "type": "object",
+                "properties": {"names": {"type": "array", "items": {"type": "string"}}},
+                "required": ["names"],
+            },
+            handler=f"{POKEAPI}:tool_get_pokemon_many",
+        ),
+        "get_type_many": Tool(
+            name="get_type_many",
+            description="Fetch type chart relations for several types at once; returns one table (row per type).",
+            schema={
+                "type": "object",
+                "properties": {"names": {"type": "array", "items": {"type": "string"}}},
+                "required": ["names"],
+            },
+            handler=f"{POKEAPI}:tool_get_type_many",
+        ),
+        "get_move_many": Tool(
+            name="get_move_many",
+            description="Fetch several moves at once; returns one table (row per move).",
+            schema={
+                "type": "object",
+                "properties": {"names": {"type": "array", "items": {"type": "string"}}},
+                "required": ["names"],
+            },
+            handler=f"{POKEAPI}:tool_get_move_many",
+        ),
+        "battle_matchup": Tool(
+            name="battle_matchup",
+            description="Head-to-head damage calculation between two Pokémon: damage % ranges, KO probabilities and speed order "
+                        "for each side's moves across level/EV assumptions. Moves are auto-picked from the level-up learnset if omitted.",
+            schema={
+                "type": "object",
+                "properties": {
+                    "pokemon_a": {"type": "string"},
+                    "pokemon_b": {"type": "string"},
+                    "moves_a": {"type": "array", "items": {"type": "string"}},
+                    "moves_b": {"type": "array", "items": {"type": "string"}},
+                    "levels": {"type": "array", "items": {"type": "integer"}},
+                    "evs": {"type": "array", "items": {"type": "integer"}},
+                },
+                "required": ["pokemon_a", "pokemon_b"],
+            },
+            handler="tools.battle:tool_battle_matchup",
         ),
     }
 
+def tool_name_index(tool_registry: Dict[str, Tool]) -> Dict[str, str]:
+    """ Lower-cased name variants the controller tends to emit -> registry key """
+    index: Dict[str, str] = {}
+    for name in tool_registry:
+        bare = name.removeprefix("get_")
+        # get_pokemon_species -> species, encounters_for_pokemon -> encounters
+        short = bare.removeprefix("pokemon_").removesuffix("_for_pokemon")
+        for base in dict.fromkeys((bare, short)):
+            for variant in (name, f"tool_{name}", base, f"get_{base}", f"tool_get_{base}"):
+                index.setdefault(variant, name)
+    return index
+
+def data_version(tool_registry: Dict[str, Tool]) -> str:
+    """ Fingerprint of DATA_VERSION + the tool specs the answers were researched with """
+    specs = sorted((t.name, json.dumps(t.schema, sort_keys=True), t.handler_ref) for t in tool_registry.values())
+    return hashlib.sha1(json.dumps([DATA_VERSION, specs]).encode()).hexdigest()[:12]
+
 # unused for now, but could be useful if switching to native tool-calling
 def openai_tools_spec(tool_registry: Dict[str, Tool]) -> List[Dict[str, Any]]:
     return [t.to_openai_spec() for t in tool_registry.values()]
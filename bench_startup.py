@@ -0,0 +1,46 @@
+"""
+Startup-time benchmark for run_agent.py.
+
+Measures cold-process wall time (median of N runs) for the CLI paths that
+don't need the network, and reports which heavy modules each path imports.
+
+    python bench_startup.py [--runs 10]
+"""
+from __future__ import annotations
+import argparse, os, statistics, subprocess, sys, time
+
+HEAVY = ["openai", "rich", "requests", "tenacity", "dotenv", "tools.pokeapi"]
+
+def _time(cmd: list[str], runs: int) -> float:
+    samples = []
+    for _ in range(runs):
+        t0 = time.perf_counter()
+        subprocess.run(cmd, check=True, capture_output=True)
+        samples.append(time.perf_counter() - t0)
+    return statistics.median(samples) * 1000
+
+def _loaded(code: str) -> list[str]:
+    probe = f"import sys\n{code}\nprint(' '.join(m for m in {HEAVY!r} if m in sys.modules))"
+    out = subprocess.run([sys.executable, "-c", probe], check=True, capture_output=True, text=True)
+    return out.stdout.split()
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--runs", type=int, default=10)
+    args = ap.parse_args()
+    os.chdir(os.path.dirname(os.path.abspath(__file__)))
+
+    cases = {
+        "python (baseline)": ([sys.executable, "-c", "pass"], "pass"),
+        "run_agent --help": ([sys.executable, "run_agent.py", "--help"], "import run_agent"),
+        "Agent() build": (
+            [sys.executable, "-c", "from agent.agent import Agent; Agent()"],
+            "from agent.agent import Agent; Agent()",
+        ),
+    }
+    print(f"{'case':<24}{'median ms':>10}  heavy modules loaded")
+    for label, (cmd, code) in cases.items():
+        print(f"{label:<24}{_time(cmd, args.runs):>10.1f}  {', '.join(_loaded(code)) or '-'}")
+
+if __name__ == "__main__":
+    main()
@@ -1,25 +1,231 @@
 from __future__ import annotations
+import threading
+import time
+from collections import Counter
+from typing import Any, Dict
+from urllib.parse import urlparse
+
 import requests
-from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type
+from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception
+
+MAX_RETRY_AFTER_S = 30.0  # never sleep longer than this on a Retry-After header
+
 
 class HTTPError(Exception):
-    pass
+    def __init__(self, message: str, status: int | None = None, retry_after: float | None = None):
+        super().__init__(message)
+        self.status = status
+        self.retry_after = retry_after
+
+    @property
+    def retryable(self) -> bool:
+        # Network errors (no status), throttling and server errors are worth retrying; other 4xx never are
+        return self.status is None or self.status == 429 or self.status >= 500
+
+
+class CircuitOpenError(HTTPError):
+    """Raised without touching the network while the upstream is considered unhealthy."""
+
+    @property
+    def retryable(self) -> bool:
+        return False
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket with additive-increase / multiplicative-decrease of the
+    refill rate: every 429 halves the rate (and honours Retry-After), every success
+    nudges it back towards `max_rate`.
+    """
+
+    def __init__(self, rate: float = 10.0, capacity: float = 10.0, min_rate: float = 0.5):
+        self.max_rate = rate
+        self.min_rate = min_rate
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._last = time.monotonic()
+        self._blocked_until = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self) -> float:
+        """Block until a token is available. Returns the seconds spent waiting."""
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._last) * self.rate)
+                self._last = now
+                if now >= self._blocked_until and self._tokens >= 1:
+                    self._tokens -= 1
+                    return waited
+                delay = max(self._blocked_until - now, (1 - self._tokens) / self.rate)
+            time.sleep(delay)
+            waited += delay
+
+    def penalize(self, retry_after: float | None = None) -> None:
+        with self._lock:
+            self.rate = max(self.min_rate, self.rate / 2)
+            if retry_after:
+                self._blocked_until = max(self._blocked_until, time.monotonic() + retry_after)
+
+    def reward(self) -> None:
+        with self._lock:
+            self.rate = min(self.max_rate, self.rate + self.max_rate * 0.05)
+
+
+class CircuitBreaker:
+    """
+    closed -> open after `failure_threshold` consecutive failed requests; half-open after
+    `reset_timeout`, where a single probe request decides between closed and open again.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = "closed"
+        self.failures = 0
+        self.opened_count = 0
+        self._opened_at = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == "open" and time.monotonic() - self._opened_at >= self.reset_timeout:
+                self.state = "half_open"
+                self._probing = False
+            if self.state == "half_open":
+                if self._probing:
+                    return False  # the probe is still in flight
+                self._probing = True
+                return True
+            return self.state == "closed"
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.state = "closed"
+            self.failures = 0
+            self._probing = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            if self.state == "half_open" or self.failures >= self.failure_threshold:
+                if self.state != "open":
+                    self.opened_count += 1
+                self.state = "open"
+                self._opened_at = time.monotonic()
+            self._probing = False
+
+
+# One limiter / breaker per upstream host, shared by every HttpClient in the process
+_shared_lock = threading.Lock()
+_limiters: Dict[str, TokenBucket] = {}
+_breakers: Dict[str, CircuitBreaker] = {}
+
+
+def _shared(host: str) -> tuple[TokenBucket, CircuitBreaker]:
+    with _shared_lock:
+        if host not in _limiters:
+            _limiters[host] = TokenBucket()
+            _breakers[host] = CircuitBreaker()
+        return _limiters[host], _breakers[host]
+
+
+def _parse_retry_after(value: str | None) -> float | None:
+    if not value:
+        return None
+    try:
+        return min(MAX_RETRY_AFTER_S, max(0.0, float(value)))
+    except ValueError:
+        return None  # HTTP-date form is not worth supporting for PokéAPI
+
+
+def _wait(retry_state) -> float:
+    exc = retry_state.outcome.exception()
+    if isinstance(exc, HTTPError) and exc.retry_after is not None:
+        return exc.retry_after
+    return wait_exponential(multiplier=0.5, min=0.5, max=8)(retry_state)
+
+
+def _count_retry(retry_state) -> None:
+    retry_state.args[0]._count("retries")
+
 
 class HttpClient:
     def __init__(self, base_url: str, headers: dict | None = None, timeout: float = 20.0):
         self.base_url = base_url.rstrip("/")
         self.headers = headers or {}
         self.timeout = timeout
+        self.limiter, self.breaker = _shared(urlparse(self.base_url).netloc)
+        self._metrics: Counter = Counter()
+        self._wait_s = 0.0
+        self._metrics_lock = threading.Lock()  # batched tools call get() from several threads
+
+    def _count(self, key: str, n: int = 1) -> None:
+        with self._metrics_lock:
+            self._metrics[key] += n
+
+    def get(self, path: str, params: dict | None = None):
+        """
+        One logical request: retries happen inside, and the circuit breaker sees a
+        single success or failure for the whole request.
+        """
+        url = f"{self.base_url}/{path.lstrip('/')}"
+        if not self.breaker.allow():
+            self._count("circuit_rejected")
+            raise CircuitOpenError(f"GET {url} -> circuit open, upstream unhealthy")
+        try:
+            data = self._get_with_retry(url, params)
+        except HTTPError as e:
+            if e.retryable:
+                self.breaker.record_failure()
+            else:
+                self.breaker.record_success()  # upstream answered, the request itself was bad
+            raise
+        except Exception:
+            self.breaker.record_failure()
+            raise
+        self.breaker.record_success()
+        return data
 
     @retry(
-        retry=retry_if_exception_type(HTTPError),
-        wait=wait_exponential(multiplier=0.5, min=0.5, max=8),
+        retry=retry_if_exception(lambda e: isinstance(e, HTTPError) and e.retryable),
+        wait=_wait,
         stop=stop_after_attempt(3),
+        before_sleep=_count_retry,
         reraise=True,
     )
-    def get(self, path: str, params: dict | None = None):
-        url = f"{self.base_url}/{path.lstrip('/')}"
-        resp = requests.get(url, params=params, headers=self.headers, timeout=self.timeout)
+    def _get_with_retry(self, url: str, params: dict | None = None):
+        waited = self.limiter.acquire()
+        with self._metrics_lock:
+            self._wait_s += waited
+            self._metrics["requests"] += 1
+        try:
+            resp = requests.get(url, params=params, headers=self.headers, timeout=self.timeout)
+        except requests.RequestException as e:
+            self._count("network_errors")
+            raise HTTPError(f"GET {url} -> {type(e).__name__}: {e}") from e
+
         if resp.status_code >= 400:
-            raise HTTPError(f"GET {url} -> {resp.status_code}: {resp.text[:200]}")
+            self._count(f"status_{resp.status_code}")
+            retry_after = _parse_retry_after(resp.headers.get("Retry-After"))
+            if resp.status_code == 429:
+                self.limiter.penalize(retry_after)
+            raise HTTPError(f"GET {url} -> {resp.status_code}: {resp.text[:200]}", resp.status_code, retry_after)
+
+        self.limiter.reward()
+        self._count("ok")
         return resp.json()
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._metrics_lock:
+            counts, wait_s = dict(self._metrics), self._wait_s
+        return {
+            **counts,
+            "rate_limit_wait_s": round(wait_s, 3),
+            "rate_per_s": round(self.limiter.rate, 2),
+            "circuit_state": self.breaker.state,
+            "circuit_opened": self.breaker.opened_count,
+        }
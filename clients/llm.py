@@ -1,26 +1,85 @@
 from __future__ import annotations
-import os, json
-from typing import Any, Dict, List
-from openai import OpenAI
-from dotenv import load_dotenv
-load_dotenv()
+import os, json, re
+from typing import Any, Dict, Iterable, List
 
 #TODO (Extension): add support for other LLM providers
 
+def repair_json(raw: str) -> Any | None:
+    """
+    Best-effort local repair of a malformed controller: strips code fences and
+    surrounding prose, drops trailing commas and closes a truncated object
+    (open string, dangling key, unclosed brackets). Returns None if still invalid.
+    """
+    text = raw.strip()
+    fenced = re.search(r"```(?:json)?\s*(.*?)(?:```|$)", text, re.S)
+    if fenced:
+        text = fenced.group(1)
+    start = text.find("{")
+    if start < 0:
+        return None
+    text = text[start:]
+
+    closers: List[str] = []
+    in_str = esc = False
+    for i, ch in enumerate(text):
+        if in_str:
+            if esc:
+                esc = False
+            elif ch == "\\":
+                esc = True
+            elif ch == '"':
+                in_str = False
+        elif ch == '"':
+            in_str = True
+        elif ch in "{[":
+            closers.append("}" if ch == "{" else "]")
+        elif ch in "}]" and closers:
+            closers.pop()
+            if not closers:
+                text = text[: i + 1]  # ignore anything after the complete object
+                break
+    else:
+        # Truncated mid-object
+        if esc:
+            text = text[:-1]
+        if in_str:
+            text += '"'
+        if closers and closers[-1] == "}":
+            # Dangling key inside an object; in an array the last string is a real element
+            text = re.sub(r'(,|\{)\s*"[^"]*"\s*:?\s*$', lambda m: "{" if m.group(1) == "{" else "", text)
+        text = re.sub(r"[,:\s]*$", "", text) + "".join(reversed(closers))
+    text = re.sub(r",\s*([}\]])", r"\1", text)
+    try:
+        return json.loads(text)
+    except json.JSONDecodeError:
+        return None
+
+
 class LLM:
     def __init__(self, model: str | None = None, temperature: float = 0.2):
-        self.client = OpenAI(api_key=os.getenv("AI_API_KEY"))
+        # openai/dotenv are slow to import: defer them until the first chat() call
+        from dotenv import load_dotenv
+        load_dotenv()
+        self._client = None
         self.model = model or os.getenv("MODEL", "gpt-4o-mini")
         self.temperature = temperature
 
-    def chat(self, messages: List[Dict[str, str]]) -> Dict[str, Any]:
+    @property
+    def client(self):
+        if self._client is None:
+            from openai import OpenAI
+            self._client = OpenAI(api_key=os.getenv("AI_API_KEY"))
+        return self._client
+
+    def chat(self, messages: Iterable[Dict[str, str]]) -> Dict[str, Any]:
         """
         no use native tool-calling. The model returns a JSON controller in content.
+        `messages` may be a stream (e.g. MessageBuffer.prompt()); it is only materialised for this request.
         """
         resp = self.client.chat.completions.create(
             model=self.model,
             temperature=self.temperature,
-            messages=messages,
+            messages=list(messages),
             # Don't provide tools and force JSON output from the model.
             response_format={"type": "json_object"},
         )
@@ -28,13 +87,30 @@ class LLM:
         choice = resp.choices[0]
         raw = choice.message.content or "{}"
 
+        repairs: List[str] = []
         try:
             msg = json.loads(raw)
         except Exception:
-            # If the model ever returns non-JSON, surface it as a write action
+            msg = repair_json(raw)
+            if isinstance(msg, dict):
+                repairs.append("json_repaired")
+            else:
+                # If the model ever returns non-JSON, surface it as a write action
+                msg = {"action": "write", "report": raw, "confidence": 0.0}
+        if not isinstance(msg, dict):
             msg = {"action": "write", "report": raw, "confidence": 0.0}
 
-        action = (msg.get("action") or "").lower().strip()
+        action = msg.get("action")
+        # A non-string action (["call"], 1, ...) counts as missing and is inferred below
+        action = action.lower().strip() if isinstance(action, str) else ""
+        if action not in ("call", "write"):
+            # Missing / misspelled action: infer it from the payload instead of wasting a step
+            if msg.get("calls"):
+                action = "call"
+            elif msg.get("report"):
+                action = "write"
+            if action:
+                repairs.append("action_inferred")
         tool_calls: List[Dict[str, Any]] = []
         content = ""
 
@@ -49,6 +125,12 @@ class LLM:
                 # Accept various keys for tool name and args
                 tool = c.get("tool") or c.get("name") or c.get("recipient_name")
                 args = c.get("args") or c.get("arguments") or c.get("parameters") or {}
+                if isinstance(args, str):
+                    # OpenAI-style stringified arguments; a bare value ("charizard") is kept
+                    # as is for ControllerRepairer to wrap
+                    parsed = repair_json(args)
+                    if parsed is not None:
+                        args = parsed
                 if tool:
                     norm.append({"tool": tool, "args": args})
             tool_calls = norm
@@ -71,4 +153,5 @@ class LLM:
             "finish_reason": choice.finish_reason,
             "id": resp.id,
             "raw_controller": msg, # for DEBUGGING
+            "repairs": repairs,
         }
@@ -1,25 +1,71 @@
 from __future__ import annotations
-import argparse, os
-from agent.agent import Agent
+import argparse
+
+# Heavy modules (openai, rich, requests, ...) are imported inside main() so that
+# `--help` and argument errors return immediately.
 
 def parse_args():
     ap = argparse.ArgumentParser(description="PokeDeep – Reactive Pokédex Agent")
-    ap.add_argument("--model", type=str, default=os.getenv("MODEL", "gpt-4o-mini"))
+    ap.add_argument("--model", type=str, default=None, help="Defaults to $MODEL (from .env) or gpt-4o-mini")
     ap.add_argument("--max-steps", type=int, default=6)
     ap.add_argument("--temperature", type=float, default=0.4)
     ap.add_argument("--verbose", action="store_true", help="Show detailed tool call results")
+    ap.add_argument("--query", type=str, default=None, help="Answer a single question and exit (implies --non-interactive)")
+    ap.add_argument("--memory-size", type=int, default=64,
+                    help="Tool results kept in session memory across questions (0 disables)")
+    ap.add_argument("--branches", type=int, default=0,
+                    help="Planner mode: research up to N independent sub-tasks concurrently (0/1 = linear loop)")
+    ap.add_argument("--archive", type=str, default="generated_reports/archive.sqlite3",
+                    help="SQLite report archive (final reports are recorded here and reused for repeated questions)")
+    ap.add_argument("--no-archive", action="store_true", help="Don't record or reuse archived reports")
+    ap.add_argument("--refresh", action="store_true", help="Research again even if the question is archived")
+    ap.add_argument("--non-interactive", action="store_true",
+                    help="Never prompt: skip the save prompt and clarification questions")
+    ap.add_argument("--max-buffer-messages", type=int, default=24,
+                    help="Conversation messages kept in memory per loop; older ones spill to a temp file")
+    ap.add_argument("--max-prompt-chars", type=int, default=120_000,
+                    help="Upper bound on prompt size; the oldest history beyond it is left out")
+    ap.add_argument("--metrics-file", type=str, default=None, metavar="PATH",
+                    help="Append per-step memory / prompt-size metrics to PATH as JSONL")
+    ap.add_argument("--search", type=str, default=None, metavar="TEXT",
+                    help="Full-text search the report archive and exit")
     return ap.parse_args()
 
-#TODO: add back query argument for one-off queries
+def _print_metrics(args, agent) -> None:
+    if args.verbose:
+        from tools.pokeapi import get_poke_api
+        print(f"PokéAPI client metrics: {get_poke_api().metrics()}")
+        if agent.memory:
+            print(f"Session memory: {agent.memory.stats()}")
+        print(f"Controller repairs: {dict(agent.repairer.stats)}")
+
 def main():
     args = parse_args()
-    agent = Agent(model=args.model, max_steps=args.max_steps, temperature=args.temperature,verbose=args.verbose)
+    if args.search:
+        from agent.archive import ReportArchive
+        for r in ReportArchive(args.archive).search(args.search):
+            print(f"#{r['id']}  {r['query']}\n    {r['snippet']}")
+        return
+
+    from agent.agent import Agent
+    agent = Agent(model=args.model, max_steps=args.max_steps, temperature=args.temperature, verbose=args.verbose,
+                  memory_size=args.memory_size,
+                  max_branches=args.branches, archive_path=None if args.no_archive else args.archive,
+                  interactive=not (args.non_interactive or args.query), reuse_archived=not args.refresh,
+                  max_buffer_messages=args.max_buffer_messages, max_prompt_chars=args.max_prompt_chars,
+                  metrics_path=args.metrics_file)
+    if args.query:
+        agent.run(args.query)
+        _print_metrics(args, agent)
+        return
+
     while True:
         question = input("\nWhat would you like to know? (or 'exit' to quit): \n").strip()
         if question.lower() in ("exit", "quit"):
             print("Goodbye!")
             break
         agent.run(question)
+        _print_metrics(args, agent)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
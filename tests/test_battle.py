@@ -0,0 +1,109 @@
+import pytest
+
+from tools import pokeapi
+from tools.battle import tool_battle_matchup
+
+STATS = ("hp", "attack", "defense", "special-attack", "special-defense", "speed")
+
+POKEMON = {
+    "charizard": (["fire", "flying"], (78, 84, 78, 109, 85, 100), ["flamethrower", "air-slash", "growl"]),
+    "blastoise": (["water"], (79, 83, 100, 85, 105, 78), ["hydro-pump", "bite", "tail-whip"]),
+    "chansey": (["normal"], (250, 5, 5, 35, 105, 50), ["growl"]),
+}
+MOVES = {
+    # name: (type, damage class, power, accuracy)
+    "hydro-pump": ("water", "special", 110, 80),
+    "bite": ("dark", "physical", 60, 100),
+    "flamethrower": ("fire", "special", 90, 100),
+    "air-slash": ("flying", "special", 75, 95),
+    "growl": ("normal", "status", None, 100),
+    "tail-whip": ("normal", "status", None, 100),
+}
+TYPES = {
+    # name: (double_damage_to, half_damage_to, no_damage_to)
+    "water": (["fire", "ground", "rock"], ["water", "grass", "dragon"], []),
+    "dark": (["psychic", "ghost"], ["fighting", "dark", "fairy"], []),
+    "fire": (["grass", "ice", "bug", "steel"], ["fire", "water", "rock", "dragon"], []),
+    "flying": (["grass", "fighting", "bug"], ["electric", "rock", "steel"], []),
+}
+
+
+def _names(names):
+    return [{"name": n} for n in names]
+
+
+def fake_get(path: str):
+    kind, name = path.strip("/").split("/")[:2]
+    if kind == "pokemon":
+        types, stats, moves = POKEMON[name]
+        return {
+            "name": name,
+            "types": [{"type": {"name": t}} for t in types],
+            "stats": [{"stat": {"name": s}, "base_stat": v} for s, v in zip(STATS, stats)],
+            "abilities": [],
+            "moves": [
+                {"move": {"name": m}, "version_group_details": [
+                    {"move_learn_method": {"name": "level-up"}, "level_learned_at": i}]}
+                for i, m in enumerate(moves)
+            ],
+        }
+    if kind == "move":
+        t, cls, power, acc = MOVES[name]
+        return {"name": name, "type": {"name": t}, "power": power, "pp": 5, "accuracy": acc,
+                "damage_class": {"name": cls}, "effect_entries": []}
+    if kind == "type":
+        double, half, none = TYPES[name]
+        return {"name": name, "pokemon": [], "damage_relations": {
+            "double_damage_to": _names(double), "half_damage_to": _names(half), "no_damage_to": _names(none)}}
+    raise AssertionError(f"unexpected request {path}")
+
+
+@pytest.fixture(autouse=True)
+def stub_api(monkeypatch):
+    api = pokeapi.PokeAPI()
+    monkeypatch.setattr(api.http, "get", fake_get)
+    monkeypatch.setattr(pokeapi, "_poke_api", api)
+    return api
+
+
+def _row(out, **match):
+    cols = out["columns"]
+    rows = [dict(zip(cols, r)) for r in out["rows"]]
+    hits = [r for r in rows if all(r[k] == v for k, v in match.items())]
+    assert len(hits) == 1, hits
+    return hits[0]
+
+
+def test_hydro_pump_vs_charizard_matches_hand_calculation():
+    out = tool_battle_matchup("blastoise", "charizard", moves_a=["hydro-pump"], moves_b=["flamethrower"],
+                              levels=[50], evs=[0])
+    row = _row(out, side="a", move="hydro-pump")
+    assert row["stab"] == 1.5 and row["effectiveness"] == 2.0
+    assert (row["min_pct"], row["max_pct"]) == (82.4, 98.0)
+    assert row["ohko_prob"] == 0.0
+    assert row["ko_in_2_prob"] == pytest.approx(0.64)
+
+
+def test_auto_picked_moves_skip_status_moves():
+    out = tool_battle_matchup("blastoise", "charizard", levels=[50], evs=[0])
+    moves = {(r[0], r[2]) for r in out["rows"]}
+    assert moves == {("a", "hydro-pump"), ("a", "bite"), ("b", "flamethrower"), ("b", "air-slash")}
+
+
+def test_mirror_match_keeps_both_sides():
+    out = tool_battle_matchup("charizard", "charizard", levels=[50, 100], evs=[0, 252])
+    assert len(out["speed"]) == 4
+    for s in out["speed"]:
+        assert s["a"] == s["b"] and s["faster"] == "tie"
+    assert {r[0] for r in out["rows"]} == {"a", "b"}
+
+
+def test_speed_order_names_the_faster_side():
+    out = tool_battle_matchup("blastoise", "charizard", levels=[50], evs=[0])
+    assert out["speed"] == [{"level": 50, "evs": 0, "a": 98, "b": 120, "faster": "b"}]
+
+
+def test_only_status_moves_is_an_error():
+    out = tool_battle_matchup("chansey", "chansey")
+    assert out["error"] == "No damaging moves found for either Pokémon"
+    assert "rows" not in out
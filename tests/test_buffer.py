@@ -0,0 +1,102 @@
+import pytest
+
+from agent.buffer import MIN_NEWEST_TURN_CHARS, MessageBuffer
+
+
+def msg(role: str, n: int, tag: str = "x") -> dict:
+    return {"role": role, "content": tag * n}
+
+
+def steps(buf: MessageBuffer, n: int, size: int = 10) -> None:
+    """ Append `n` controller steps: an assistant call and the observations it got back """
+    for i in range(n):
+        buf.append(msg("assistant", size, tag=chr(ord("a") + 2 * i)))
+        buf.append(msg("user", size, tag=chr(ord("b") + 2 * i)))
+
+
+def content(m: dict) -> str:
+    return m["content"]
+
+
+@pytest.fixture
+def pinned():
+    return [msg("system", 100, "s"), msg("user", 50, "q")]
+
+
+def test_spilled_messages_are_read_back_in_order(pinned):
+    buf = MessageBuffer(pinned, max_in_memory=2)
+    steps(buf, 3)
+    assert len(buf) == 8
+    assert buf.metrics()["messages_spilled"] == 4 and buf.metrics()["messages_in_memory"] == 4
+    assert list(buf.prompt()) == list(buf)
+    assert [m["content"][0] for m in buf][2:] == list("abcdef")
+    assert buf.last_prompt == {"messages": 8, "chars": 210, "omitted": 0}
+
+
+def test_oldest_history_is_omitted_with_a_note(pinned):
+    # 150 pinned + newest turn (20) + one older message (10) fit; the 3 before it don't
+    buf = MessageBuffer(pinned, max_in_memory=2, max_prompt_chars=185)
+    steps(buf, 3)
+    sent = list(buf.prompt())
+    assert sent[:2] == pinned
+    assert content(sent[2]) == "(3 earlier messages omitted to keep the prompt bounded.)"
+    assert [m["content"][0] for m in sent[3:]] == list("def")
+    assert buf.last_prompt["omitted"] == 3 and buf.last_prompt["messages"] == 6
+
+
+def test_older_history_stops_at_the_first_message_that_does_not_fit(pinned):
+    buf = MessageBuffer(pinned, max_in_memory=10, max_prompt_chars=250)
+    buf.append(msg("user", 10, "x"))
+    buf.append(msg("assistant", 90, "y"))  # too big, so "x" must not be sent after the gap
+    buf.append(msg("user", 10, "z"))
+    steps(buf, 1)
+    sent = list(buf.prompt())
+    assert [m["content"][0] for m in sent[3:]] == list("zab")
+    assert buf.last_prompt["omitted"] == 2
+
+
+def test_oversized_newest_turn_is_truncated_but_sent(pinned):
+    buf = MessageBuffer(pinned, max_in_memory=10, max_prompt_chars=3150)
+    steps(buf, 2)
+    buf.append(msg("assistant", 50, "c"))
+    buf.append(msg("user", 5000, "o"))
+    sent = list(buf.prompt())
+    call, obs = sent[-2:]
+    assert call == msg("assistant", 50, "c")  # the short call is kept whole
+    assert obs["content"].startswith("o" * 2950 + "… (truncated 2050 chars")
+    assert "o" * 2951 not in obs["content"]
+    # Nothing older fits next to it
+    assert content(sent[2]).startswith("(4 earlier messages omitted")
+    assert buf.last_prompt["omitted"] == 4
+
+
+def test_newest_turn_keeps_a_floor_when_pinned_messages_use_the_budget():
+    buf = MessageBuffer([msg("system", 5000, "s")], max_in_memory=4, max_prompt_chars=1000)
+    steps(buf, 1)
+    buf.append(msg("assistant", 10, "c"))
+    buf.append(msg("user", 10_000, "o"))
+    sent = list(buf.prompt())
+    call, obs = sent[-2:]
+    assert call["content"] == "c" * 10
+    assert obs["content"].startswith("o" * (MIN_NEWEST_TURN_CHARS - 10) + "…")
+    assert buf.last_prompt["omitted"] == 2
+
+
+def test_newest_turn_without_a_controller_message_is_the_last_message(pinned):
+    buf = MessageBuffer(pinned, max_in_memory=4, max_prompt_chars=160)
+    buf.append(msg("user", 3000, "o"))
+    sent = list(buf.prompt())
+    assert len(sent) == 3
+    assert sent[-1]["content"].startswith("o" * MIN_NEWEST_TURN_CHARS + "… (truncated 1000")
+
+
+@pytest.mark.parametrize("sizes, max_chars, expected", [
+    ([10, 20], 100, [10, 20]),               # fits: untouched
+    ([10, 300, 500], 400, [10, 195, 195]),   # short message kept, large ones cut to a common cap
+    ([500, 10], 100, [90, 10]),
+])
+def test_fit_water_fills(sizes, max_chars, expected):
+    turn = [msg("user", n) for n in sizes]
+    out = MessageBuffer._fit(turn, max_chars)
+    assert [len(m["content"].split("…")[0]) for m in out] == expected
+    assert turn == [msg("user", n) for n in sizes]  # input left as is
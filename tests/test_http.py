@@ -0,0 +1,108 @@
+import threading
+import uuid
+
+import pytest
+from tenacity import wait_none
+
+from clients import http
+from clients.http import CircuitOpenError, HttpClient, HTTPError
+
+
+class FakeResponse:
+    def __init__(self, status_code: int, headers: dict | None = None, body: dict | None = None):
+        self.status_code = status_code
+        self.headers = headers or {}
+        self.text = "x"
+        self._body = body or {}
+
+    def json(self):
+        return self._body
+
+
+@pytest.fixture
+def client(monkeypatch):
+    """ A client on a fresh host (limiter / breaker are shared per host) with no retry sleeps """
+    monkeypatch.setattr(HttpClient._get_with_retry.retry, "wait", wait_none())
+    return HttpClient(f"https://{uuid.uuid4().hex}.test")
+
+
+def serve(monkeypatch, *responses):
+    """ Patch requests.get to return `responses` in order (the last one repeats); returns the call log """
+    calls = []
+
+    def fake_get(url, **kwargs):
+        calls.append(url)
+        return responses[min(len(calls), len(responses)) - 1]
+
+    monkeypatch.setattr(http.requests, "get", fake_get)
+    return calls
+
+
+def test_404_is_not_retried(client, monkeypatch):
+    calls = serve(monkeypatch, FakeResponse(404))
+    with pytest.raises(HTTPError) as e:
+        client.get("/pokemon/missingno")
+    assert e.value.status == 404 and not e.value.retryable
+    assert len(calls) == 1
+    assert client.breaker.state == "closed" and client.breaker.failures == 0
+
+
+def test_429_honours_retry_after_and_halves_rate(client, monkeypatch):
+    calls = serve(monkeypatch, FakeResponse(429, {"Retry-After": "0"}), FakeResponse(200, body={"name": "ditto"}))
+    assert client.get("/pokemon/ditto") == {"name": "ditto"}
+    assert len(calls) == 2
+    assert client.metrics()["retries"] == 1
+    # Halved by the 429, then one additive step back up from the success
+    assert client.limiter.rate == pytest.approx(10.0 / 2 + 10.0 * 0.05)
+
+
+def test_breaker_opens_after_threshold_failed_requests(client, monkeypatch):
+    calls = serve(monkeypatch, FakeResponse(503))
+    for _ in range(client.breaker.failure_threshold - 1):
+        with pytest.raises(HTTPError):
+            client.get("/pokemon/ditto")
+    # Every request was retried, but each counts as one failure
+    assert len(calls) == 3 * (client.breaker.failure_threshold - 1)
+    assert client.breaker.state == "closed"
+
+    with pytest.raises(HTTPError):
+        client.get("/pokemon/ditto")
+    assert client.breaker.state == "open"
+    n = len(calls)
+    with pytest.raises(CircuitOpenError):
+        client.get("/pokemon/ditto")
+    assert len(calls) == n  # rejected without touching the network
+
+
+def test_half_open_lets_exactly_one_probe_through(client, monkeypatch):
+    client.breaker.state = "open"
+    client.breaker.reset_timeout = 0
+    started, release = threading.Event(), threading.Event()
+
+    def slow_ok(url, **kwargs):
+        started.set()
+        release.wait(5)
+        return FakeResponse(200, body={"ok": True})
+
+    monkeypatch.setattr(http.requests, "get", slow_ok)
+    results = []
+    probe = threading.Thread(target=lambda: results.append(client.get("/pokemon/ditto")))
+    probe.start()
+    assert started.wait(5)
+    for _ in range(3):
+        with pytest.raises(CircuitOpenError):
+            client.get("/pokemon/ditto")
+    release.set()
+    probe.join(5)
+    assert results == [{"ok": True}]
+    assert client.breaker.state == "closed"
+    assert client.metrics()["circuit_rejected"] == 3
+
+
+def test_failed_probe_reopens_the_breaker(client, monkeypatch):
+    client.breaker.state = "open"
+    client.breaker.reset_timeout = 0
+    serve(monkeypatch, FakeResponse(503))
+    with pytest.raises(HTTPError):
+        client.get("/pokemon/ditto")
+    assert client.breaker.state == "open"
@@ -0,0 +1,45 @@
+import pytest
+
+from agent.memory import SessionMemory
+from agent.observations import Observation
+
+
+def remember(memory, tool, args, result):
+    obs = Observation(tool=tool, args=args)
+    obs.finish(result=result)
+    memory.remember(tool, obs)
+
+
+@pytest.fixture
+def memory():
+    m = SessionMemory()
+    remember(m, "get_type", {"name": "ice"}, {"name": "ice"})
+    remember(m, "get_evolution_chain", {"id": 1}, {"id": 1, "chain": {}})
+    remember(m, "get_pokemon", {"name_or_id": "Mr-Mime"}, {"summary": {"name": "mr-mime"}})
+    m.add_fact("Tell me about ice, Mr. Mime and chain 1", "…")
+    return m
+
+
+@pytest.mark.parametrize("query, tools", [
+    ("What is the price of #10 in Gen 1?", []),
+    ("Is Ice good against dragons?", ["get_type"]),
+    ("Tell me about Mr. Mime", ["get_pokemon"]),
+])
+def test_relevant_keys_match_whole_tokens(memory, query, tools):
+    memory._last_entities = set()
+    assert [k.split(":")[0] for k in memory._relevant_keys(query)] == tools
+
+
+@pytest.mark.parametrize("query, follow_up", [
+    ("How does it compare to Venusaur?", True),
+    ("Is Mr. Mime faster than Jynx?", True),  # about the previous question's entities
+    ("What are the base stats of Mewtwo?", False),
+    ("Which Pokemon that lives near the sea is easiest to catch in Sapphire?", False),
+    ("What evolves at level 1?", False),  # bare numeric ids never match
+])
+def test_refers_back(memory, query, follow_up):
+    assert memory.refers_back(query) is follow_up
+
+
+def test_first_question_is_never_a_follow_up():
+    assert SessionMemory().refers_back("How does it compare to Venusaur?") is False
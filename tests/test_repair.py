@@ -0,0 +1,126 @@
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from agent.repair import ControllerRepairer
+from agent.tools import build_tool_registry, tool_name_index
+from clients.llm import LLM, repair_json
+
+
+@pytest.fixture
+def repairer():
+    registry = build_tool_registry()
+    return ControllerRepairer(registry, tool_name_index(registry))
+
+
+# --- repair_json ---------------------------------------------------------------
+
+@pytest.mark.parametrize("raw, expected", [
+    ('```json\n{"action": "write", "report": "done"}\n```', {"action": "write", "report": "done"}),
+    ('Sure! {"action": "call", "calls": []} hope that helps', {"action": "call", "calls": []}),
+    ('{"action": "call", "calls": [{"tool": "get_type", "args": {"name": "ice"},}],}',
+     {"action": "call", "calls": [{"tool": "get_type", "args": {"name": "ice"}}]}),
+    ('{"action": "write", "report": "Charizard is', {"action": "write", "report": "Charizard is"}),
+    ('{"action": "call", "reasoning": "x", "calls', {"action": "call", "reasoning": "x"}),
+    ('{"action": "call", "calls": [{"tool": "get_type"', {"action": "call", "calls": [{"tool": "get_type"}]}),
+])
+def test_repair_json(raw, expected):
+    assert repair_json(raw) == expected
+
+
+def test_repair_json_keeps_last_array_element():
+    assert repair_json('{"names":["pikachu","raichu"') == {"names": ["pikachu", "raichu"]}
+    assert repair_json('{"names":["pikachu","rai') == {"names": ["pikachu", "rai"]}
+
+
+@pytest.mark.parametrize("raw", ["charizard", "67", "", "not json at all"])
+def test_repair_json_rejects_non_objects(raw):
+    assert repair_json(raw) is None
+
+
+# --- resolve_tool --------------------------------------------------------------
+
+@pytest.mark.parametrize("name, expected", [
+    ("get_pokemon_species", "get_pokemon_species"),
+    ("get_species", "get_pokemon_species"),
+    ("species", "get_pokemon_species"),
+    ("Get Pokemon", "get_pokemon"),
+    ("pokemon_speces", "get_pokemon_species"),
+    ("get_abilty", "get_ability"),
+    ("get_evolutionchain", "get_evolution_chain"),
+    ("get_encounters", "encounters_for_pokemon"),
+    ("battle_match", "battle_matchup"),
+    # Not tools we have: must stay unknown rather than hit a near-miss
+    ("get_item", None),
+    ("get_region", None),
+    ("get_version_group", None),
+    ("get_berry", None),
+    ("", None),
+])
+def test_resolve_tool(repairer, name, expected):
+    assert repairer.resolve_tool(name) == expected
+
+
+def test_unknown_tool_is_passed_through_and_saves_nothing(repairer):
+    calls = [{"tool": "get_item", "args": {"name": "potion"}}]
+    assert repairer.repair_calls(calls) == calls
+    assert repairer.stats["steps_saved"] == 0 and repairer.stats["tool_renamed"] == 0
+
+
+# --- repair_args ---------------------------------------------------------------
+
+@pytest.mark.parametrize("tool, args, expected, fixes", [
+    ("get_type", "charizard", {"name": "charizard"}, ["args_wrapped"]),
+    ("get_pokemon", {"name": "pikachu"}, {"name_or_id": "pikachu"}, ["args_renamed"]),
+    ("get_pokemon", {"pokemon": "pikachu", "verbose": True}, {"name_or_id": "pikachu"}, ["args_renamed", "args_dropped"]),
+    ("get_evolution_chain", {"id": "67"}, {"id": 67}, ["args_coerced"]),
+    ("get_evolution_chain", {"id": "https://pokeapi.co/api/v2/evolution-chain/67/"}, {"id": 67}, ["args_coerced"]),
+    ("get_pokemon_many", {"names": "pikachu, raichu"}, {"names": ["pikachu", "raichu"]}, ["args_coerced"]),
+    ("get_move", {"name": ["thunderbolt"]}, {"name": "thunderbolt"}, ["args_coerced"]),
+    ("get_type", {"name": "ice"}, {"name": "ice"}, []),
+])
+def test_repair_args(repairer, tool, args, expected, fixes):
+    assert repairer.repair_args(repairer.registry[tool], args) == (expected, fixes)
+
+
+# --- steps_saved ---------------------------------------------------------------
+
+@pytest.mark.parametrize("calls, llm_repairs, action, saved", [
+    ([{"tool": "get_type", "args": "charizard"}], [], "call", 1),
+    ([{"tool": "get_pokemon", "args": {"name": "pikachu"}}], [], "call", 1),
+    ([{"tool": "pokemon_speces", "args": {"name_or_id": "pikachu"}}], [], "call", 1),
+    # Already accepted by the agent without repair
+    ([{"tool": "get_evolution_chain", "args": {"id": "67"}}], [], "call", 0),
+    ([{"tool": "pokemon", "args": {"name_or_id": "pikachu"}}], [], "call", 0),
+    ([], ["json_repaired"], "write", 0),
+    ([], ["action_inferred"], "write", 1),
+    # Still fails after repair
+    ([{"tool": "get_pokemon", "args": {}}], [], "call", 0),
+    ([{"tool": "get_pokemon", "args": {"name": "x"}}, {"tool": "fly_to_moon", "args": {}}], [], "call", 0),
+])
+def test_steps_saved(repairer, calls, llm_repairs, action, saved):
+    repairer.repair_calls(calls, llm_repairs, action)
+    assert repairer.stats["steps_saved"] == saved
+
+
+# --- LLM.chat controller parsing ---------------------------------------------------
+
+def fake_llm(controller: dict) -> LLM:
+    """ An LLM whose client returns `controller` as the message content """
+    llm = LLM.__new__(LLM)
+    llm.model, llm.temperature = "test", 0.0
+    reply = SimpleNamespace(
+        id="resp-1",
+        choices=[SimpleNamespace(finish_reason="stop", message=SimpleNamespace(content=json.dumps(controller)))],
+    )
+    llm._client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=lambda **kw: reply)))
+    return llm
+
+
+@pytest.mark.parametrize("action", [["call"], 1, None, "CALL?"])
+def test_non_string_or_unknown_action_is_inferred(action):
+    calls = [{"tool": "get_pokemon", "args": {"name_or_id": "ditto"}}]
+    resp = fake_llm({"action": action, "calls": calls}).chat([])
+    assert resp["type"] == "call" and resp["tool_calls"] == calls
+    assert resp["repairs"] == ["action_inferred"]
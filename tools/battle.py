@@ -0,0 +1,167 @@
+from __future__ import annotations
+from typing import Any, Dict, List
+
+import numpy as np
+
+from tools.pokeapi import (
+    get_poke_api,
+    summarizer,
+    fan_out,
+    tool_get_move,
+    tool_get_pokemon,
+    tool_get_type,
+)
+
+# Damage model (Gen V+ formula): IV 31, neutral nature, same EVs in every stat,
+# no crits / abilities / items / weather / stat stages. Good enough to rank moves
+# and estimate KO chances; not a replacement for a full competitive calculator.
+DEFAULT_LEVELS = [50, 100]
+DEFAULT_EVS = [0, 252]
+IV = 31
+ROLLS = np.arange(85, 101)  # the 16 random damage rolls, in percent
+MOVES_PER_SIDE = 4
+AUTO_MOVE_CANDIDATES = 16  # learnset moves fetched when the caller gives none
+STAB = 1.5
+STAT_FOR_CLASS = {"physical": ("attack", "defense"), "special": ("special-attack", "special-defense")}
+
+
+@summarizer
+def _summarize_learnset(data: Dict[str, Any]) -> List[str]:
+    """ Level-up moves, latest-learned first (they tend to be the strongest) """
+    learned: Dict[str, int] = {}
+    for m in data.get("moves", []):
+        for d in m.get("version_group_details", []):
+            if d.get("move_learn_method", {}).get("name") == "level-up":
+                name = m["move"]["name"]
+                learned[name] = max(learned.get(name, 0), d.get("level_learned_at") or 0)
+    return sorted(learned, key=lambda n: -learned[n])
+
+
+def _type_multiplier(rel: Dict[str, Any], defender_types: List[str]) -> float:
+    """ `rel` is the tool_get_type summary of the move's type """
+    mult = 1.0
+    for t in defender_types:
+        if t in rel["no_damage_to"]:
+            mult *= 0.0
+        elif t in rel["double_damage_to"]:
+            mult *= 2.0
+        elif t in rel["half_damage_to"]:
+            mult *= 0.5
+    return mult
+
+
+def _pick_moves(name: str, moves: List[str] | None, errors: Dict[str, str]) -> List[Dict[str, Any]]:
+    names = moves or get_poke_api().get_pokemon(name, summarize=_summarize_learnset)[:AUTO_MOVE_CANDIDATES]
+    results, errs = fan_out(tool_get_move, names)
+    errors.update({f"{name}:{k}": v for k, v in errs.items()})
+    damaging = [m for m in results.values() if m.get("power") and m.get("damage_class") in STAT_FOR_CLASS]
+    if moves:
+        return damaging
+    # Rank auto-picked moves by expected raw power
+    damaging.sort(key=lambda m: -(m["power"] * (m["accuracy"] or 100)))
+    return damaging[:MOVES_PER_SIDE]
+
+
+def _stat(base: np.ndarray, level: np.ndarray, ev: np.ndarray, hp: bool = False) -> np.ndarray:
+    core = np.floor((2 * base + IV + np.floor(ev / 4)) * level / 100)
+    return core + level + 10 if hp else core + 5
+
+
+def tool_battle_matchup(
+    pokemon_a: str,
+    pokemon_b: str,
+    moves_a: List[str] | None = None,
+    moves_b: List[str] | None = None,
+    levels: List[int] | None = None,
+    evs: List[int] | None = None,
+) -> Dict[str, Any]:
+    """
+    Damage ranges, KO probabilities and speed order for every move of each side
+    against the other, across all level x EV assumptions, in one NumPy pass.
+    """
+    levels = levels or DEFAULT_LEVELS
+    evs = evs or DEFAULT_EVS
+    errors: Dict[str, str] = {}
+    mons = {
+        "a": tool_get_pokemon(pokemon_a)["summary"],
+        "b": tool_get_pokemon(pokemon_b)["summary"],
+    }
+    sides = {"a": _pick_moves(pokemon_a, moves_a, errors), "b": _pick_moves(pokemon_b, moves_b, errors)}
+    # Type relations for every distinct move type, fetched concurrently like the moves
+    relations, errs = fan_out(tool_get_type, sorted({m["type"] for ms in sides.values() for m in ms}))
+    errors.update({f"type:{k}": v for k, v in errs.items()})
+
+    # One row per (attacker side, move); both directions share the same arrays
+    rows_meta, power, acc, stab, eff, atk_base, def_base, hp_base = [], [], [], [], [], [], [], []
+    for side, other in (("a", "b"), ("b", "a")):
+        att, dfn = mons[side], mons[other]
+        for m in sides[side]:
+            if m["type"] not in relations:
+                continue  # effectiveness unknown; the failed type fetch is listed in errors
+            atk_stat, def_stat = STAT_FOR_CLASS[m["damage_class"]]
+            rows_meta.append((side, att["name"], m))
+            power.append(m["power"])
+            acc.append((m["accuracy"] or 100) / 100)
+            stab.append(STAB if m["type"] in att["types"] else 1.0)
+            eff.append(_type_multiplier(relations[m["type"]], dfn["types"]))
+            atk_base.append(att["stats"][atk_stat])
+            def_base.append(dfn["stats"][def_stat])
+            hp_base.append(dfn["stats"]["hp"])
+
+    if not rows_meta:
+        return {"error": "No damaging moves found for either Pokémon", "errors": errors}
+
+    # Axes: [level, ev, move, roll]
+    L = np.asarray(levels, dtype=float)[:, None, None]
+    E = np.asarray(evs, dtype=float)[None, :, None]
+    A = _stat(np.asarray(atk_base, dtype=float), L, E)
+    D = _stat(np.asarray(def_base, dtype=float), L, E)
+    HP = _stat(np.asarray(hp_base, dtype=float), L, E, hp=True)
+    base = np.floor(np.floor(np.floor(2 * L / 5 + 2) * np.asarray(power) * A / D) / 50) + 2
+    # Random roll, STAB and type effectiveness are each floored in turn
+    dmg = np.floor(base[..., None] * ROLLS / 100)
+    dmg = np.floor(np.floor(dmg * np.asarray(stab)[:, None]) * np.asarray(eff)[:, None])
+    hp = HP[..., None]
+    p = np.asarray(acc)
+
+    ohko = (dmg >= hp).mean(axis=-1)
+    # Two hits: every pair of rolls, counting only pairs where the first hit didn't already KO
+    pair = ((dmg[..., :, None] < hp[..., None]) & (dmg[..., :, None] + dmg[..., None, :] >= hp[..., None])).mean(axis=(-1, -2))
+    ko1 = p * ohko
+    ko2 = ko1 + (1 - p) * p * ohko + p * p * pair
+    min_pct = dmg.min(axis=-1) / HP * 100
+    max_pct = dmg.max(axis=-1) / HP * 100
+
+    columns = ["side", "attacker", "move", "type", "class", "power", "accuracy", "level", "evs",
+               "stab", "effectiveness", "min_pct", "max_pct", "ohko_prob", "ko_in_2_prob"]
+    rows = []
+    for i, lv in enumerate(levels):
+        for j, ev in enumerate(evs):
+            for k, (side, att_name, m) in enumerate(rows_meta):
+                rows.append([
+                    side, att_name, m["name"], m["type"], m["damage_class"], m["power"], m["accuracy"], lv, ev,
+                    stab[k], eff[k], round(float(min_pct[i, j, k]), 1), round(float(max_pct[i, j, k]), 1),
+                    round(float(ko1[i, j, k]), 3), round(float(ko2[i, j, k]), 3),
+                ])
+
+    # Speed order per scenario
+    spd = _stat(np.asarray([mons["a"]["stats"]["speed"], mons["b"]["stats"]["speed"]], dtype=float), L, E)
+    speed = []
+    for i, lv in enumerate(levels):
+        for j, ev in enumerate(evs):
+            sa, sb = spd[i, j]
+            faster = "a" if sa > sb else "b" if sb > sa else "tie"
+            # Keyed by side so a mirror match keeps both entries
+            speed.append({"level": lv, "evs": ev, "a": int(sa), "b": int(sb), "faster": faster})
+
+    out: Dict[str, Any] = {
+        "pokemon": {s: {"name": m["name"], "types": m["types"], "stats": m["stats"]} for s, m in mons.items()},
+        "assumptions": "Gen V+ damage formula; IV 31, neutral nature, same EVs in every stat; no crits, abilities, items or weather. "
+                       "pct = share of defender HP per hit; side and speed keys refer to `pokemon`.",
+        "columns": columns,
+        "rows": rows,
+        "speed": speed,
+    }
+    if errors:
+        out["errors"] = errors
+    return out
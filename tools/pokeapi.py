@@ -1,55 +1,220 @@
 from __future__ import annotations
-from typing import Any, Dict, List
-from clients.http import HttpClient
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List
+from clients.http import HttpClient, HTTPError, CircuitOpenError
 
 BASE = "https://pokeapi.co/api/v2"
+CACHE_TTL_S = 24 * 60 * 60  # PokéAPI data is effectively static
+CACHE_MAX_ENTRIES = 512  # cached resources, LRU; most only hold their small projections
+CACHE_MAX_RAW = 32  # of those, how many keep their full raw JSON (a /pokemon payload is ~300 KB)
+MAX_FAN_OUT = 8  # concurrent requests per batched tool call
+
+Summarizer = Callable[[Any], Any]
+
+def summarizer(fn: Summarizer) -> Summarizer:
+    """
+    Register a pure raw-JSON -> summary function. Its projection is built once per
+    fetched resource and cached next to the raw JSON under the function's name. The
+    cache lives only as long as the process, so a changed summarizer never meets
+    projections built by its old code and needs no version.
+    """
+    fn.projection_key = f"{fn.__module__}:{fn.__name__}"
+    return fn
+
+class _CacheEntry:
+    """ One fetched resource version: the raw JSON (None once dropped) plus its materialized summaries """
+    __slots__ = ("fetched_at", "data", "projections")
+
+    def __init__(self, data: Any):
+        self.fetched_at = time.time()
+        self.data = data
+        self.projections: Dict[str, Any] = {}
 
 #TODO: add more tools for moves, abilities, etc.
 class PokeAPI:
-    def __init__(self):
+    def __init__(self, ttl: float = CACHE_TTL_S, max_entries: int = CACHE_MAX_ENTRIES, max_raw: int = CACHE_MAX_RAW):
         self.http = HttpClient(BASE)
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_raw = max_raw
+        # path -> entry, least recently used first; shared by every tool and batched fan-out
+        self._cache: OrderedDict[str, _CacheEntry] = OrderedDict()
+        # paths whose entry still holds raw JSON, least recently used first
+        self._raw: OrderedDict[str, None] = OrderedDict()
+        self._lock = threading.Lock()
+        self.cache_hits = 0
+        self.stale_served = 0
+        self.evictions = 0
+        self.raw_dropped = 0
+        self.raw_refetches = 0
+        self.projection_hits = 0
+        self.projection_builds = 0
+
+    def _forget(self, path: str) -> None:
+        del self._cache[path]
+        self._raw.pop(path, None)
+        self.evictions += 1
+
+    def _trim(self) -> None:
+        """
+        Keep the cache bounded (call with the lock held): drop entries past twice the
+        TTL (stale serving only needs one extra TTL), then least recently used entries
+        over `max_entries`. Raw JSON is kept for the `max_raw` most recent resources only;
+        older entries keep just their projections, or go entirely if they have none.
+        """
+        now = time.time()
+        for path in [p for p, e in self._cache.items() if now - e.fetched_at >= 2 * self.ttl]:
+            self._forget(path)
+        while len(self._cache) > self.max_entries:
+            self._forget(next(iter(self._cache)))
+        while len(self._raw) > self.max_raw:
+            path = next(iter(self._raw))
+            entry = self._cache[path]
+            if entry.projections:
+                self._raw.pop(path)
+                entry.data = None
+                self.raw_dropped += 1
+            else:
+                self._forget(path)
+
+    def _servable(self, entry: _CacheEntry, projection: str | None) -> bool:
+        return projection in entry.projections or entry.data is not None
+
+    def _entry(self, path: str, projection: str | None = None) -> tuple[_CacheEntry, Any]:
+        """
+        GET with an in-process cache so repeated / batched lookups hit the network once.
+        Returns the entry and its raw JSON; the raw JSON is None when the entry already
+        holds `projection` and its raw payload was dropped.
+        """
+        with self._lock:
+            hit = self._cache.get(path)
+            if hit is not None:
+                self._cache.move_to_end(path)
+                if path in self._raw:
+                    self._raw.move_to_end(path)
+                fresh = time.time() - hit.fetched_at < self.ttl
+                if fresh and self._servable(hit, projection):
+                    self.cache_hits += 1
+                    return hit, hit.data
+        try:
+            data = self.http.get(path)
+        except HTTPError as e:
+            # Upstream unhealthy (circuit open / 5xx / 429 after retries): an expired entry beats an error
+            if hit is not None and (isinstance(e, CircuitOpenError) or e.retryable):
+                with self._lock:
+                    if self._servable(hit, projection):
+                        self.stale_served += 1
+                        return hit, hit.data
+            raise
+        with self._lock:
+            if hit is not None and self._cache.get(path) is hit and time.time() - hit.fetched_at < self.ttl:
+                # Only the raw payload had been dropped: same resource version, keep its projections
+                entry = hit
+                entry.data = data
+                self.raw_refetches += 1
+            else:
+                # A fresh fetch is a new resource version, so it starts without projections
+                entry = _CacheEntry(data)
+                self._cache[path] = entry
+                self._cache.move_to_end(path)
+            self._raw[path] = None
+            self._raw.move_to_end(path)
+            self._trim()
+        return entry, data
+
+    def _get(self, path: str, summarize: Summarizer | None = None) -> Any:
+        """ Raw JSON for `path`, or its cached projection when `summarize` is given """
+        key = summarize.projection_key if summarize is not None else None
+        entry, data = self._entry(path, key)
+        if summarize is None:
+            return data
+        proj = entry.projections.get(key)
+        if proj is not None:
+            with self._lock:
+                self.projection_hits += 1
+            return proj
+        proj = summarize(data)
+        with self._lock:
+            entry.projections[key] = proj
+            self.projection_builds += 1
+        return proj
 
     # --- Core endpoints ---
-    def get_pokemon(self, name: str) -> Dict[str, Any]:
+    def get_pokemon(self, name: str, summarize: Summarizer | None = None) -> Dict[str, Any]:
         name = name.strip().lower()
-        return self.http.get(f"/pokemon/{name}")
+        return self._get(f"/pokemon/{name}", summarize)
 
-    def get_pokemon_species(self, name: str) -> Dict[str, Any]:
+    def get_pokemon_species(self, name: str, summarize: Summarizer | None = None) -> Dict[str, Any]:
         name = name.strip().lower()
-        return self.http.get(f"/pokemon-species/{name}")
+        return self._get(f"/pokemon-species/{name}", summarize)
 
-    def get_type(self, name: str) -> Dict[str, Any]:
-        return self.http.get(f"/type/{name.strip().lower()}")
+    def get_type(self, name: str, summarize: Summarizer | None = None) -> Dict[str, Any]:
+        return self._get(f"/type/{name.strip().lower()}", summarize)
 
-    def get_move(self, name: str) -> Dict[str, Any]:
-        return self.http.get(f"/move/{name.strip().lower()}")
+    def get_move(self, name: str, summarize: Summarizer | None = None) -> Dict[str, Any]:
+        return self._get(f"/move/{name.strip().lower()}", summarize)
 
-    def list_pokemon_by_habitat(self, habitat: str) -> Dict[str, Any]:
-        return self.http.get(f"/pokemon-habitat/{habitat.strip().lower()}")
+    def list_pokemon_by_habitat(self, habitat: str, summarize: Summarizer | None = None) -> Dict[str, Any]:
+        return self._get(f"/pokemon-habitat/{habitat.strip().lower()}", summarize)
     
     # NOT WORKING: returns empty list
-    def encounters_for_pokemon(self, name: str) -> List[Dict[str, Any]]:
+    def encounters_for_pokemon(self, name: str, summarize: Summarizer | None = None) -> List[Dict[str, Any]]:
         name = name.strip().lower()
-        return self.http.get(f"/pokemon/{name}/encounters")
+        return self._get(f"/pokemon/{name}/encounters", summarize)
 
-    def generation(self, id_or_name: str) -> Dict[str, Any]:
-        return self.http.get(f"/generation/{id_or_name}")
+    def generation(self, id_or_name: str, summarize: Summarizer | None = None) -> Dict[str, Any]:
+        return self._get(f"/generation/{id_or_name}", summarize)
 
-    def version(self, name: str) -> Dict[str, Any]:
-        return self.http.get(f"/version/{name}")
+    def version(self, name: str, summarize: Summarizer | None = None) -> Dict[str, Any]:
+        return self._get(f"/version/{name}", summarize)
     
-    def get_ability(self, name: str) -> Dict[str, Any]:
-        return self.http.get(f"/ability/{name.strip().lower()}")
+    def get_ability(self, name: str, summarize: Summarizer | None = None) -> Dict[str, Any]:
+        return self._get(f"/ability/{name.strip().lower()}", summarize)
 
-    def get_encounter_condition(self, id_or_name: str) -> Dict[str, Any]:
-        return self.http.get(f"/encounter-condition/{id_or_name}")
-# Singleton
-poke_api = PokeAPI()
+    def get_encounter_condition(self, id_or_name: str, summarize: Summarizer | None = None) -> Dict[str, Any]:
+        return self._get(f"/encounter-condition/{id_or_name}", summarize)
 
-# --- Tool handler functions (pure) ---
+    def get_evolution_chain(self, id: str, summarize: Summarizer | None = None) -> Dict[str, Any]:
+        return self._get(f"/evolution-chain/{id}", summarize)
 
-def tool_get_pokemon(name_or_id: str) -> Dict[str, Any]:
-    data = poke_api.get_pokemon(name_or_id)
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            **self.http.metrics(),
+            "cache_entries": len(self._cache),
+            "cache_raw_entries": len(self._raw),
+            "cache_hits": self.cache_hits,
+            "cache_evictions": self.evictions,
+            "raw_dropped": self.raw_dropped,
+            "raw_refetches": self.raw_refetches,
+            "stale_served": self.stale_served,
+            "projection_hits": self.projection_hits,
+            "projection_builds": self.projection_builds,
+        }
+# Singleton, built on first use so importing this module stays cheap
+_poke_api: PokeAPI | None = None
+_poke_api_lock = threading.Lock()
+
+def get_poke_api() -> PokeAPI:
+    global _poke_api
+    if _poke_api is None:
+        with _poke_api_lock:
+            if _poke_api is None:
+                _poke_api = PokeAPI()
+    return _poke_api
+
+def __getattr__(name: str) -> Any:
+    # Keeps `from tools.pokeapi import poke_api` working
+    if name == "poke_api":
+        return get_poke_api()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+# --- Summarizers (pure raw JSON -> compact summary, cached per resource version) ---
+
+@summarizer
+def _summarize_pokemon(data: Dict[str, Any]) -> Dict[str, Any]:
     # Summarise essential bits to keep tokens small
     moves = data.get("moves", [])
     summary = {
@@ -64,9 +229,8 @@ def tool_get_pokemon(name_or_id: str) -> Dict[str, Any]:
     }
     return {"summary": summary}
 
-def tool_get_pokemon_species(name_or_id: str) -> Dict[str, Any]:
-    """ More details about a Pokémon species """
-    data = poke_api.get_pokemon_species(name_or_id)
+@summarizer
+def _summarize_pokemon_species(data: Dict[str, Any]) -> Dict[str, Any]:
     flavor = next((e["flavor_text"] for e in data.get("flavor_text_entries", []) if e["language"]["name"] == "en"), None)
     habitat = data.get("habitat", {}).get("name")
     growth_rate = data.get("growth_rate", {}).get("name")
@@ -83,9 +247,8 @@ def tool_get_pokemon_species(name_or_id: str) -> Dict[str, Any]:
         "flavor": flavor,
     }
 
-def tool_get_type(name: str) -> Dict[str, Any]:
-    """ Type relations and some Pokémon of this type """
-    data = poke_api.get_type(name)
+@summarizer
+def _summarize_type(data: Dict[str, Any]) -> Dict[str, Any]:
     pokemon = [p["pokemon"]["name"] for p in data.get("pokemon", [])[:min(20,len(data.get("pokemon", [])))] ]  # first 20 Pokémon of this type
     damage_rel = data.get("damage_relations", {})
     double_to = [t["name"] for t in damage_rel.get("double_damage_to", [])]
@@ -105,9 +268,8 @@ def tool_get_type(name: str) -> Dict[str, Any]:
         "pokemon_of_type": pokemon,
     }
 
-def tool_get_move(name: str) -> Dict[str, Any]:
-    """ Move details """
-    data = poke_api.get_move(name)
+@summarizer
+def _summarize_move(data: Dict[str, Any]) -> Dict[str, Any]:
     return {
         "name": data.get("name"),
         "type": data.get("type", {}).get("name"),
@@ -118,14 +280,13 @@ def tool_get_move(name: str) -> Dict[str, Any]:
         "effect": next((e["short_effect"] for e in data.get("effect_entries", []) if e["language"]["name"] == "en"), None),
     }
 
-def tool_list_pokemon_by_habitat(habitat: str) -> Dict[str, Any]:
-    data = poke_api.list_pokemon_by_habitat(habitat)
+@summarizer
+def _summarize_habitat(data: Dict[str, Any]) -> Dict[str, Any]:
     species = [s["name"] for s in data.get("pokemon_species", [])]
     return {"habitat": data.get("name"), "species": species}
 
-# NOT WORKING AS INTENDED
-def tool_encounters_for_pokemon(name: str) -> Dict[str, Any]:
-    data = poke_api.encounters_for_pokemon(name)
+@summarizer
+def _summarize_encounters(data: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
     # Simplify
     entries = []
     for area in data:
@@ -134,42 +295,40 @@ def tool_encounters_for_pokemon(name: str) -> Dict[str, Any]:
             "location_area": area.get("location_area", {}).get("name"),
             "versions": list(sorted(set(version_details)))
         })
-    return {"name": name.lower(), "encounters": entries}
+    return entries
 
-def tool_generation(id_or_name: str) -> Dict[str, Any]:
-    data = poke_api.generation(id_or_name)
+@summarizer
+def _summarize_generation(data: Dict[str, Any]) -> Dict[str, Any]:
     return {
         "name": data.get("name"),
         "main_region": data.get("main_region", {}).get("name"),
         "version_groups": [vg["name"] for vg in data.get("version_groups", [])],
     }
 
-def tool_version(name: str) -> Dict[str, Any]:
-    data = poke_api.version(name)
+@summarizer
+def _summarize_version(data: Dict[str, Any]) -> Dict[str, Any]:
     # Tie version to version_group (e.g., ruby/sapphire -> generation-iii)
     return {
         "name": data.get("name"),
         "version_group": data.get("version_group", {}).get("name"),
     }
 
-def tool_get_ability(name: str) -> Dict[str, Any]:
-    """ Ability details and some Pokémon that have it """
-    data = poke_api.get_ability(name)
+@summarizer
+def _summarize_ability(data: Dict[str, Any]) -> Dict[str, Any]:
     pokemon_list = data.get("pokemon", [])
     pokemon = [p["pokemon"]["name"] for p in pokemon_list[:min(20,len(pokemon_list))]]  # first 20 Pokémon with this ability
-    effect = next((e["effect"] for e in data.get("effect_entries", []) if e["language"]["name"] == "en"), None)
-    short_effect = next((e["short_effect"] for e in data.get("effect_entries", []) if e["language"]["name"] == "en"), None)
+    en = next((e for e in data.get("effect_entries", []) if e["language"]["name"] == "en"), {})
     return {
         "name": data.get("name"),
         "generation": data.get("generation", {}).get("name"),
         "is_main_series": data.get("is_main_series"),
-        "effect": effect,
-        "short_effect": short_effect,
+        "effect": en.get("effect"),
+        "short_effect": en.get("short_effect"),
         "pokemon_with_ability": pokemon,
     }
-# ALMOST NEVER CALLED
-def tool_get_encounter_condition(id_or_name: str) -> Dict[str, Any]:
-    data = poke_api.get_encounter_condition(id_or_name)
+
+@summarizer
+def _summarize_encounter_condition(data: Dict[str, Any]) -> Dict[str, Any]:
     en_name = next(
         (n.get("name") for n in data.get("names", []) if n.get("language", {}).get("name") == "en"),
         None,
@@ -188,9 +347,8 @@ def tool_get_encounter_condition(id_or_name: str) -> Dict[str, Any]:
         "values": values,  # e.g., [{"id": "1", "name": "morning"}, ...]
     }
 
-def tool_get_evolution_chain(id: str) -> Dict[str, Any]:
-    """ Evolution chain details by ID """
-    data = poke_api.http.get(f"/evolution-chain/{id}")
+@summarizer
+def _summarize_evolution_chain(data: Dict[str, Any]) -> Dict[str, Any]:
     # Simplify the evolution chain structure
     def parse_chain(chain):
         evo = {
@@ -203,3 +361,101 @@ def tool_get_evolution_chain(id: str) -> Dict[str, Any]:
         "chain": parse_chain(data.get("chain", {}))
     }
 
+# --- Tool handler functions (serve the materialized summaries) ---
+
+def tool_get_pokemon(name_or_id: str) -> Dict[str, Any]:
+    return get_poke_api().get_pokemon(name_or_id, summarize=_summarize_pokemon)
+
+def tool_get_pokemon_species(name_or_id: str) -> Dict[str, Any]:
+    """ More details about a Pokémon species """
+    return get_poke_api().get_pokemon_species(name_or_id, summarize=_summarize_pokemon_species)
+
+def tool_get_type(name: str) -> Dict[str, Any]:
+    """ Type relations and some Pokémon of this type """
+    return get_poke_api().get_type(name, summarize=_summarize_type)
+
+def tool_get_move(name: str) -> Dict[str, Any]:
+    """ Move details """
+    return get_poke_api().get_move(name, summarize=_summarize_move)
+
+def tool_list_pokemon_by_habitat(habitat: str) -> Dict[str, Any]:
+    return get_poke_api().list_pokemon_by_habitat(habitat, summarize=_summarize_habitat)
+
+# NOT WORKING AS INTENDED
+def tool_encounters_for_pokemon(name: str) -> Dict[str, Any]:
+    entries = get_poke_api().encounters_for_pokemon(name, summarize=_summarize_encounters)
+    return {"name": name.lower(), "encounters": entries}
+
+def tool_generation(id_or_name: str) -> Dict[str, Any]:
+    return get_poke_api().generation(id_or_name, summarize=_summarize_generation)
+
+def tool_version(name: str) -> Dict[str, Any]:
+    return get_poke_api().version(name, summarize=_summarize_version)
+
+def tool_get_ability(name: str) -> Dict[str, Any]:
+    """ Ability details and some Pokémon that have it """
+    return get_poke_api().get_ability(name, summarize=_summarize_ability)
+
+# ALMOST NEVER CALLED
+def tool_get_encounter_condition(id_or_name: str) -> Dict[str, Any]:
+    return get_poke_api().get_encounter_condition(id_or_name, summarize=_summarize_encounter_condition)
+
+def tool_get_evolution_chain(id: str) -> Dict[str, Any]:
+    """ Evolution chain details by ID """
+    return get_poke_api().get_evolution_chain(id, summarize=_summarize_evolution_chain)
+
+# --- Batched handlers (fan out concurrently, one compact columnar result) ---
+
+def fan_out(handler: Callable[[str], Dict[str, Any]], names: List[str]) -> tuple[Dict[str, Any], Dict[str, str]]:
+    """
+    Run `handler` for every name concurrently. Returns (results, errors) keyed by
+    the requested name so one bad name never fails the whole batch.
+    """
+    if isinstance(names, str):
+        names = [names]  # a bare name would otherwise fan out one request per character
+    names = list(dict.fromkeys(str(n).strip().lower() for n in names if str(n).strip()))
+    results: Dict[str, Any] = {}
+    errors: Dict[str, str] = {}
+    if not names:
+        return results, errors
+    with ThreadPoolExecutor(max_workers=min(MAX_FAN_OUT, len(names))) as pool:
+        futures = {n: pool.submit(handler, n) for n in names}
+        for n, fut in futures.items():
+            try:
+                results[n] = fut.result()
+            except Exception as e:
+                errors[n] = str(e)
+    return results, errors
+
+def _table(columns: List[str], rows: List[List[Any]], errors: Dict[str, str]) -> Dict[str, Any]:
+    out: Dict[str, Any] = {"columns": columns, "rows": rows}
+    if errors:
+        out["errors"] = errors
+    return out
+
+def tool_get_pokemon_many(names: List[str]) -> Dict[str, Any]:
+    """ Stats table with one row per Pokémon """
+    results, errors = fan_out(tool_get_pokemon, names)
+    stat_names = ["hp", "attack", "defense", "special-attack", "special-defense", "speed"]
+    columns = ["name", "types", *stat_names, "total", "abilities"]
+    rows = []
+    for r in results.values():
+        s = r["summary"]
+        stats = [s["stats"].get(k) for k in stat_names]
+        rows.append([s["name"], "/".join(s["types"]), *stats, sum(v or 0 for v in stats), ",".join(s["abilities"])])
+    return _table(columns, rows, errors)
+
+def tool_get_type_many(names: List[str]) -> Dict[str, Any]:
+    """ Type chart relations, one row per type """
+    results, errors = fan_out(tool_get_type, names)
+    columns = ["name", "double_damage_to", "double_damage_from", "half_damage_to",
+               "half_damage_from", "no_damage_to", "no_damage_from"]
+    rows = [[r["name"], *(",".join(r[c]) for c in columns[1:])] for r in results.values()]
+    return _table(columns, rows, errors)
+
+def tool_get_move_many(names: List[str]) -> Dict[str, Any]:
+    """ Move details, one row per move """
+    results, errors = fan_out(tool_get_move, names)
+    columns = ["name", "type", "power", "pp", "accuracy", "damage_class", "effect"]
+    rows = [[r[c] for c in columns] for r in results.values()]
+    return _table(columns, rows, errors)